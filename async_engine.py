@@ -0,0 +1,121 @@
+import asyncio
+
+import tqdm
+
+import http_client
+import result_cache
+import segment_db
+from resilience import RETRYABLE_STATUS, CircuitOpenError, backoff_delay
+
+try:
+    import aiohttp
+except ImportError:  # asyncio引擎为可选功能，未安装aiohttp时仅多线程引擎可用
+    aiohttp = None
+
+
+async def _fetch_data(session, phone_number, timeout):
+    """请求API，成功返回data字段，code≠0时返回None"""
+    async with session.get(http_client.API_URL, params={"number": phone_number}, timeout=timeout) as response:
+        response.raise_for_status()
+        result = await response.json(content_type=None)
+    if result.get("code") != 0:
+        return None
+    return result.get("data", {})
+
+
+def _is_retryable(exc):
+    """超时、连接失败和429/5xx属于临时故障"""
+    if isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError)):
+        return True
+    return isinstance(exc, aiohttp.ClientResponseError) and exc.status in RETRYABLE_STATUS
+
+
+async def _fetch_with_retry(session, phone_number, timeout, retries):
+    """带重试和熔断的API请求，与多线程引擎共用QPS上限和熔断器"""
+    breaker = http_client.get_circuit_breaker()
+    for attempt in range(retries + 1):
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            # 熔断时在线程池中等待恢复，避免阻塞事件循环
+            await asyncio.get_running_loop().run_in_executor(
+                None, breaker.before_call, http_client.BATCH_CIRCUIT_WAIT)
+        limiter = http_client.get_rate_limiter()
+        if limiter is not None:
+            await limiter.acquire_async()
+
+        try:
+            data = await _fetch_data(session, phone_number, timeout)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if not _is_retryable(e):
+                if isinstance(e, aiohttp.ClientResponseError):
+                    breaker.record_success()  # 上游有正常应答（如4xx），不计入熔断
+                else:
+                    breaker.release()  # 上游未应答（如URL无效），熔断器状态不变
+                raise
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        breaker.record_success()
+        return data
+
+
+async def _query_one(session, semaphore, phone_number, format_data, timeout):
+    """查询单个号码：本地号段表/缓存未命中时，在信号量限制内请求API"""
+    try:
+        data = segment_db.lookup(phone_number)
+        if data is None:
+            data = result_cache.get(phone_number)
+
+        if data is None:
+            async with semaphore:
+                data = await _fetch_with_retry(session, phone_number, timeout, http_client.DEFAULT_RETRIES)
+            if data is None:
+                return ("API查询失败", "API查询失败")
+            result_cache.put(phone_number, data)
+
+        return format_data(data)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+        message = str(e) or type(e).__name__
+        return (f"网络错误: {message[:15]}", f"网络错误: {message[:15]}")
+    except Exception as e:
+        return (f"解析错误: {str(e)[:15]}", f"解析错误: {str(e)[:15]}")
+
+
+async def _query_all(numbers, format_data, concurrency, timeout, on_result):
+    semaphore = asyncio.Semaphore(concurrency)
+    # 所有请求共用一个连接池（保持长连接并缓存DNS）
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def run(key, phone_number):
+            return key, await _query_one(session, semaphore, phone_number, format_data, client_timeout)
+
+        tasks = [asyncio.ensure_future(run(key, number)) for key, number in numbers.items()]
+        results = {}
+        for task in tqdm.tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="处理进度"):
+            key, info = await task
+            results[key] = info
+            if on_result:
+                on_result(key, info)
+        return results
+
+
+def query_numbers(numbers, format_data, concurrency=200, timeout=8, on_result=None):
+    """
+    asyncio批量查询：单线程内保持最多concurrency个请求同时进行
+    :param numbers: {键: 清洗后的11位号码}
+    :param format_data: 将API的data字段转换为 (归属地, 运营商) 的函数
+    :param concurrency: 同时进行的最大请求数
+    :param timeout: 单个请求超时时间（秒）
+    :param on_result: 可选回调 on_result(键, (归属地, 运营商))，每得到一个结果调用一次
+    :return: {键: (归属地, 运营商)}
+    """
+    if aiohttp is None:
+        raise RuntimeError("asyncio引擎需要安装aiohttp：pip install aiohttp")
+    return asyncio.run(_query_all(numbers, format_data, concurrency, timeout, on_result))
@@ -0,0 +1,247 @@
+"""
+端到端吞吐量测试：在本地模拟接口（fake_upstream）上运行各查询路径，离线比较性能
+    number              逐个查询版 number.batch_query_excel
+    concurrent          并发版 号码归属地查询并发版.batch_query_excel（多线程引擎）
+    async               并发版 号码归属地查询并发版.batch_query_excel（asyncio引擎，需安装aiohttp）
+    proxy               开箱即用.py 的Flask代理（/query，多个客户端并发请求）
+输出每个场景的 行/秒、上游请求延迟 p50/p99（proxy为客户端请求延迟）和上游请求次数
+
+用法：python benchmark.py --rows 5000 --segments 500 --latency 30 --error-rate 0.02
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_upstream
+
+SCENARIOS = ("number", "concurrent", "async", "proxy")
+REQUIRED_COLUMNS = ["序号", "姓名", "性别", "民族", "联系电话", "归属地", "运营商"]
+
+
+def make_numbers(rows, segments, invalid_rate, seed=None):
+    """生成测试号码：共 segments 个不同号段，invalid_rate 比例为无效号码"""
+    rng = random.Random(seed)
+    prefixes = [f"1{rng.choice('3578')}{rng.randrange(10 ** 5):05d}" for _ in range(segments)]
+    return [f"{rng.choice(prefixes)}{rng.randrange(10 ** 4):04d}" if rng.random() >= invalid_rate else "12345"
+            for _ in range(rows)]
+
+
+def make_workbook(path, numbers):
+    import pandas as pd
+    df = pd.DataFrame({
+        "序号": range(1, len(numbers) + 1),
+        "姓名": "测试",
+        "性别": "男",
+        "民族": "汉",
+        "联系电话": numbers,
+        "归属地": "",
+        "运营商": "",
+    }, columns=REQUIRED_COLUMNS)
+    df.to_excel(path, index=False, engine="openpyxl")
+
+
+def percentile(values, q):
+    """最近秩法百分位数（values为空时返回None）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+@contextlib.contextmanager
+def timed_upstream_calls():
+    """统计每次上游请求（含重试）的耗时：临时包装 http_client.get 和asyncio引擎的 _fetch_with_retry"""
+    import http_client
+    import async_engine
+    original_get = http_client.get
+    original_fetch = async_engine._fetch_with_retry
+    latencies = []
+
+    def get(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_get(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    async def fetch_with_retry(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await original_fetch(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    http_client.get = get
+    async_engine._fetch_with_retry = fetch_with_retry
+    try:
+        yield latencies
+    finally:
+        http_client.get = original_get
+        async_engine._fetch_with_retry = original_fetch
+
+
+@contextlib.contextmanager
+def quiet(enabled):
+    """屏蔽被测程序的进度输出"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def run_number(workdir, input_path, args):
+    import number
+    path = os.path.join(workdir, "number.xlsx")
+    shutil.copy(input_path, path)  # number.batch_query_excel 会覆盖原文件
+    with timed_upstream_calls() as latencies, quiet(not args.verbose):
+        number.batch_query_excel(path, qps=args.qps)
+    return latencies
+
+
+def run_concurrent(workdir, input_path, args, engine_name="thread"):
+    engine = importlib.import_module("号码归属地查询并发版")
+    path = os.path.join(workdir, f"{engine_name}.xlsx")
+    shutil.copy(input_path, path)
+    with timed_upstream_calls() as latencies, quiet(not args.verbose):
+        engine.batch_query_excel(path, max_workers=args.workers, engine=engine_name, qps=args.qps, resume=False)
+    return latencies
+
+
+def run_proxy(workdir, numbers, args):
+    import requests
+    import wsgi_server
+    app_module = importlib.import_module("开箱即用")
+    port = app_module.find_available_port(5600)
+    app_module.app.config['PORT'] = port
+    threading.Thread(target=wsgi_server.serve, args=(app_module.app, "localhost", port), daemon=True).start()
+    if not app_module.wait_until_ready(port):
+        raise RuntimeError("代理服务启动超时")
+
+    # 每个客户端线程使用自己的长连接，模拟浏览器的并发请求
+    local = threading.local()
+    latencies = []
+
+    def query(number):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            local.session.get(f"http://localhost:{port}/query", params={"number": number}, timeout=30)
+        except requests.RequestException:
+            pass
+        latencies.append(time.perf_counter() - start)
+
+    with quiet(not args.verbose), ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(query, numbers))
+    return latencies
+
+
+def run_scenario(name, upstream, workdir, input_path, numbers, args):
+    import result_cache
+    # 每个场景使用新的空缓存，避免命中上一个场景的结果
+    result_cache.configure(path=os.path.join(workdir, f"{name}_cache.db"))
+    upstream.reset_stats()
+
+    start = time.perf_counter()
+    if name == "number":
+        latencies = run_number(workdir, input_path, args)
+    elif name == "concurrent":
+        latencies = run_concurrent(workdir, input_path, args)
+    elif name == "async":
+        latencies = run_concurrent(workdir, input_path, args, engine_name="async")
+    else:
+        latencies = run_proxy(workdir, numbers, args)
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+    return {
+        "scenario": name,
+        "rows": len(numbers),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(len(numbers) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+        "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        "upstream": upstream.stats(),
+    }
+
+
+def print_report(results):
+    print(f"{'场景':<12}{'行数':>8}{'耗时(秒)':>10}{'行/秒':>10}{'p50(ms)':>10}{'p99(ms)':>10}"
+          f"{'上游请求':>10}{'失败':>6}{'限流':>6}")
+    for r in results:
+        upstream = r["upstream"]
+        print(f"{r['scenario']:<12}{r['rows']:>8}{r['seconds']:>10}{r['rows_per_sec']:>10}"
+              f"{r['p50_ms'] if r['p50_ms'] is not None else '-':>10}"
+              f"{r['p99_ms'] if r['p99_ms'] is not None else '-':>10}"
+              f"{upstream['calls']:>10}{upstream['errors'] + upstream['failed']:>6}{upstream['throttled']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询路径端到端吞吐量测试（使用本地模拟接口，不访问真实API）")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"逗号分隔，可选：{','.join(SCENARIOS)}")
+    parser.add_argument("--rows", type=int, default=2000, help="测试号码数量")
+    parser.add_argument("--segments", type=int, default=200, help="不同号段的数量（决定去重后的查询量）")
+    parser.add_argument("--invalid-rate", type=float, default=0.01, help="无效号码比例")
+    parser.add_argument("--workers", type=int, default=30, help="并发版的最大并发数（async为同时进行的请求数）/ proxy场景的客户端并发数")
+    parser.add_argument("--qps", type=float, default=None, help="客户端每秒最大请求数（不填则不限速）")
+    parser.add_argument("--latency", type=float, default=20, help="模拟接口基础延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=5, help="模拟接口延迟抖动（毫秒）")
+    parser.add_argument("--slow-rate", type=float, default=0.01, help="慢请求比例")
+    parser.add_argument("--slow-latency", type=float, default=500, help="慢请求延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0, help="模拟接口返回503的比例")
+    parser.add_argument("--fail-rate", type=float, default=0, help="模拟接口返回code≠0的比例")
+    parser.add_argument("--upstream-qps", type=float, default=None, help="模拟接口的限流QPS，超出返回429")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    parser.add_argument("--verbose", action="store_true", help="显示被测程序的输出")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"未知场景：{','.join(sorted(unknown))}")
+
+    upstream = fake_upstream.FakeUpstream(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency / 1000, error_rate=args.error_rate, fail_rate=args.fail_rate,
+        qps=args.upstream_qps, seed=args.seed,
+    ).start()
+    # 被测模块在导入时读取接口地址，必须在导入前设置
+    os.environ["PHONE_API_URL"] = upstream.url
+
+    workdir = tempfile.mkdtemp(prefix="phone_benchmark_")
+    os.environ["PHONE_CACHE_PATH"] = os.path.join(workdir, "cache.db")
+    try:
+        numbers = make_numbers(args.rows, args.segments, args.invalid_rate, args.seed)
+        input_path = os.path.join(workdir, "input.xlsx")
+        make_workbook(input_path, numbers)
+        print(f"模拟接口：{upstream.url}，测试数据：{args.rows} 行，{args.segments} 个号段")
+
+        results = []
+        for name in scenarios:
+            print(f"运行 {name} ...", flush=True)
+            results.append(run_scenario(name, upstream, workdir, input_path, numbers, args))
+        print()
+        print_report(results)
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+    finally:
+        upstream.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
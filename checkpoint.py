@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """计算输入文件指纹（文件大小+SHA1），用于判断断点记录是否属于同一份输入"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return f"{os.path.getsize(path)}-{digest.hexdigest()}"
+
+
+class Journal:
+    """
+    断点续查日志：只追加写入的JSONL文件，首行记录输入文件指纹，之后每行一条已完成的结果
+    {"row": 行号, "number": 号码, "location": 归属地, "operator": 运营商}
+    程序中断后以同一输入重新运行时，已完成的行直接从日志取结果，不再查询
+    """
+
+    def __init__(self, path, fingerprint):
+        """
+        :param path: 日志文件路径
+        :param fingerprint: 输入文件指纹，与已有日志不一致时丢弃旧日志重新开始
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.completed = {}  # {行号: (号码, 归属地, 运营商)}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path) and self._load():
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self.completed.clear()
+            self._file = open(path, "w", encoding="utf-8")
+            self._file.write(json.dumps({"fingerprint": fingerprint}) + "\n")
+            self._file.flush()
+
+    def _load(self):
+        """读取已有日志，指纹不一致返回False；末尾写了一半的记录（中断时产生）会被截掉"""
+        valid_size = 0
+        with open(self.path, "rb") as f:
+            header = f.readline()
+            try:
+                if not header.endswith(b"\n") or json.loads(header).get("fingerprint") != self.fingerprint:
+                    return False
+            except ValueError:
+                return False
+            valid_size = len(header)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("不完整的记录")
+                    record = json.loads(line)
+                    self.completed[record["row"]] = (record["number"], record["location"], record["operator"])
+                except (ValueError, KeyError):
+                    break
+                valid_size += len(line)
+
+        if valid_size < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_size)
+        return True
+
+    def write(self, records):
+        """
+        追加已完成的结果并立即落盘
+        :param records: 可迭代的 (行号, 号码, 归属地, 运营商)
+        """
+        with self._lock:
+            lines = []
+            for row, number, location, operator in records:
+                row = int(row)
+                self.completed[row] = (number, location, operator)
+                lines.append(json.dumps({"row": row, "number": number, "location": location,
+                                         "operator": operator}, ensure_ascii=False) + "\n")
+            if lines:
+                self._file.writelines(lines)
+                self._file.flush()
+
+    def results_for(self, rows):
+        """返回指定行中已完成的结果 {行号: (归属地, 运营商)}"""
+        with self._lock:
+            return {row: self.completed[row][1:] for row in rows if row in self.completed}
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        self._file.close()
+
+    def remove(self):
+        """全部完成后删除日志"""
+        self.close()
+        os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.closed:
+            self.close()
@@ -0,0 +1,89 @@
+// 网页端共用的并发控制：自适应并发控制器（AIMD）和滑动窗口工作池
+// 号码归属地查询并发网页版.html 通过 <script src="concurrency.js"> 加载，开箱即用.py 将本文件内联到页面中
+
+// 自适应并发控制（AIMD）：每完成limit个请求评估一次，吞吐量提升则并发数+1；
+// 出现超时或查询失败时减半，每轮最多减半一次：减半后，开始于减半之后的一整轮请求完成前的失败不再减半
+function createConcurrencyController(maxLimit) {
+    return {
+        limit: Math.min(5, maxLimit),
+        maxLimit: maxLimit,
+        lastThroughput: 0,
+        windowStart: performance.now(),
+        windowCount: 0,
+        windowSuccesses: 0,
+        started: 0,
+        cutTicket: 0,
+        cutWindow: 0,
+        completedSinceCut: 0,
+
+        resetWindow() {
+            this.windowStart = performance.now();
+            this.windowCount = 0;
+            this.windowSuccesses = 0;
+        },
+
+        // 开始一次查询（或一次批量请求），返回序号（每个号码的结果都以此序号传给record）
+        start() {
+            return ++this.started;
+        },
+
+        // 记录一个号码的最终结果（重试后的结果，每个号码只记录一次）
+        record(ok, ticket) {
+            this.windowCount++;
+            const afterCut = ticket > this.cutTicket;
+            if (afterCut) {
+                this.completedSinceCut++;
+            }
+            if (!ok) {
+                if (afterCut && this.completedSinceCut >= this.cutWindow) {
+                    this.limit = Math.max(1, Math.floor(this.limit / 2));
+                    this.cutTicket = this.started;
+                    this.cutWindow = this.limit;
+                    this.completedSinceCut = 0;
+                    this.lastThroughput = 0;
+                    this.resetWindow();
+                }
+                return;
+            }
+            this.windowSuccesses++;
+            if (this.windowCount >= this.limit) {
+                const elapsed = Math.max((performance.now() - this.windowStart) / 1000, 0.001);
+                const throughput = this.windowSuccesses / elapsed;
+                if (throughput > this.lastThroughput) {
+                    this.limit = Math.min(this.maxLimit, this.limit + 1);
+                }
+                this.lastThroughput = throughput;
+                this.resetWindow();
+            }
+        }
+    };
+}
+
+// 滑动窗口工作池：始终保持 getLimit() 个任务同时进行，任一任务完成立即开始下一个
+// （每次补位时重新读取 getLimit()，并发数可随自适应控制器动态变化）
+function runPool(items, getLimit, worker) {
+    return new Promise((resolve) => {
+        let next = 0;
+        let active = 0;
+
+        function fill() {
+            if (next >= items.length && active === 0) {
+                resolve();
+                return;
+            }
+            while (active < getLimit() && next < items.length) {
+                const index = next++;
+                active++;
+                Promise.resolve()
+                    .then(() => worker(items[index], index))
+                    .catch(error => console.error('任务执行出错:', error))
+                    .finally(() => {
+                        active--;
+                        fill();
+                    });
+            }
+        }
+
+        fill();
+    });
+}
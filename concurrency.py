@@ -0,0 +1,117 @@
+import threading
+import time
+
+
+class AIMDController:
+    """
+    自适应并发控制（AIMD：加性增、乘性减）
+    每完成 limit 个请求评估一次：吞吐量较上一轮提升则并发数+1；
+    出现超时或API返回失败时将并发数乘以 decrease_factor，每轮最多削减一次：
+    削减后，直到削减之后开始的一整轮（新并发数个）请求完成前，其余失败不再削减
+    （削减前已发出的请求反映的是旧并发数下的状况）
+    延迟只用于统计：并发数不变时延迟上升会使吞吐量不再提升，加性增随之停止
+    """
+
+    def __init__(self, maximum=30, initial=5, minimum=1, decrease_factor=0.5):
+        """
+        :param maximum: 并发数上限
+        :param initial: 初始并发数
+        :param minimum: 并发数下限
+        :param decrease_factor: 出错时的并发数缩减系数
+        """
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = max(self.minimum, min(initial, self.maximum))
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.completed = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self._started = 0  # 已开始的请求数（请求序号）
+        self._cut_ticket = 0  # 上次削减时已开始的请求数，序号不大于它的请求开始于削减之前
+        self._cut_window = 0  # 上次削减后需要完成的请求数
+        self._completed_since_cut = 0
+        self._last_throughput = 0.0
+        self._cond = threading.Condition()
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._window_successes = 0
+
+    def acquire(self):
+        """
+        占用一个并发名额，已达当前上限时阻塞等待
+        :return: 请求序号（释放时传给 release）
+        """
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            self._started += 1
+            return self._started
+
+    def release(self, latency, ok, ticket=None):
+        """
+        释放名额并记录本次请求结果
+        :param latency: 请求耗时（秒）
+        :param ok: 是否成功（超时、网络错误、API返回code≠0均视为失败）
+        :param ticket: acquire 返回的请求序号，None表示视为最新开始的请求
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_latency += latency
+            self._window_count += 1
+            after_cut = ticket is None or ticket > self._cut_ticket
+            if after_cut:
+                self._completed_since_cut += 1
+
+            if not ok:
+                self.failures += 1
+                if after_cut and self._completed_since_cut >= self._cut_window:
+                    # 乘性减：降低并发，并开始新一轮观察
+                    self.limit = max(self.minimum, int(self.limit * self.decrease_factor))
+                    self._cut_ticket = self._started
+                    self._cut_window = self.limit
+                    self._completed_since_cut = 0
+                    self._last_throughput = 0.0
+                    self._reset_window()
+            else:
+                self._window_successes += 1
+                if self._window_count >= self.limit:
+                    elapsed = max(time.monotonic() - self._window_start, 1e-6)
+                    throughput = self._window_successes / elapsed
+                    # 加性增：吞吐量仍在提升时继续增加并发
+                    if throughput > self._last_throughput:
+                        self.limit = min(self.maximum, self.limit + 1)
+                    self._last_throughput = throughput
+                    self._reset_window()
+            self._cond.notify_all()
+
+    def run(self, func, *args, is_ok=None):
+        """
+        在并发控制下执行 func(*args)，返回其结果
+        :param is_ok: 根据返回值判断成功与否的函数，默认不抛异常即成功
+        """
+        ticket = self.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            result = func(*args)
+            ok = is_ok(result) if is_ok else True
+            return result
+        finally:
+            self.release(time.monotonic() - start, ok, ticket)
+
+    def stats(self):
+        """当前并发数、完成数、失败数与平均延迟"""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failures": self.failures,
+                "avg_latency": self.total_latency / self.completed if self.completed else 0.0,
+            }
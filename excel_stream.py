@@ -0,0 +1,172 @@
+import csv
+import os
+
+import pandas as pd
+
+# 读取后端：openpyxl只读模式（默认，无需额外依赖）、calamine（Rust实现，速度快，需 pip install python-calamine）
+READER_BACKENDS = ("openpyxl", "calamine")
+# 写入后端：openpyxl只写模式（默认）、xlsxwriter常量内存模式（速度更快，需 pip install xlsxwriter）
+WRITER_BACKENDS = ("openpyxl", "xlsxwriter")
+
+
+def available_reader_backends():
+    """返回当前环境可用的读取后端"""
+    backends = ["openpyxl"]
+    try:
+        import python_calamine  # noqa: F401
+        backends.append("calamine")
+    except ImportError:
+        pass
+    return backends
+
+
+def available_writer_backends():
+    """返回当前环境可用的写入后端"""
+    backends = ["openpyxl"]
+    try:
+        import xlsxwriter  # noqa: F401
+        backends.append("xlsxwriter")
+    except ImportError:
+        pass
+    return backends
+
+
+def iter_rows(path, backend="openpyxl"):
+    """
+    逐行读取表格第一个工作表（不会把整个文件载入内存）
+    :param path: .xlsx/.xls/.csv 文件路径（.xls需使用calamine后端）
+    :param backend: 读取后端，见 READER_BACKENDS
+    :return: 行生成器，每行是一个值列表，第一行为表头
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            yield from csv.reader(f)
+        return
+
+    if backend == "calamine":
+        from python_calamine import CalamineWorkbook
+        workbook = CalamineWorkbook.from_path(path)
+        yield from workbook.get_sheet_by_index(0).iter_rows()
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def normalize_header(header):
+    """
+    表头行转为列名（与pandas读取时一致）：空白单元格命名为 "Unnamed: 列序号"，
+    重复的列名依次加后缀 ".1"、".2"……，保证每列名称唯一
+    """
+    columns = []
+    seen = {}
+    for i, col in enumerate(header):
+        name = f"Unnamed: {i}" if col is None or str(col).strip() == "" else str(col)
+        base = name
+        while name in seen:
+            seen[base] += 1
+            name = f"{base}.{seen[base]}"
+        seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def iter_chunks(path, chunk_size=50000, backend="openpyxl"):
+    """
+    按块读取表格，每块为一个DataFrame，内存占用只与chunk_size有关
+    :return: 生成器，依次产出各块DataFrame（列名取自表头行，索引为从0开始的全局数据行号）
+    """
+    rows = iter_rows(path, backend)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = normalize_header(header)
+
+    chunk = []
+    start = 0
+    for row in rows:
+        # 补齐或截断到表头长度
+        row = list(row[:len(columns)]) + [None] * (len(columns) - len(row))
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield pd.DataFrame(chunk, columns=columns, index=range(start, start + len(chunk)))
+            start += len(chunk)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk, columns=columns, index=range(start, start + len(chunk)))
+
+
+def read_header(path, backend="openpyxl"):
+    """只读取表头行，列名与 iter_chunks 产出的各块一致"""
+    rows = iter_rows(path, backend)
+    try:
+        return normalize_header(next(rows, []))
+    finally:
+        rows.close()
+
+
+class StreamWriter:
+    """
+    流式写入表格：逐块追加行，已写入的行不再驻留内存
+    .xlsx 使用 openpyxl 只写模式或 xlsxwriter 常量内存模式，.csv 直接逐行写入
+    """
+
+    def __init__(self, path, columns, backend="openpyxl"):
+        self.path = path
+        self.columns = list(columns)
+        self.backend = backend
+        self.rows_written = 0
+        ext = os.path.splitext(path)[1].lower()
+
+        if ext == ".csv":
+            self._file = open(path, "w", encoding="utf-8-sig", newline="")
+            self._csv = csv.writer(self._file)
+            self._write = self._csv.writerow
+        elif backend == "xlsxwriter":
+            import xlsxwriter
+            self._workbook = xlsxwriter.Workbook(path, {
+                "constant_memory": True,
+                "default_date_format": "yyyy-mm-dd hh:mm:ss",
+                "nan_inf_to_errors": True,
+            })
+            self._sheet = self._workbook.add_worksheet()
+            self._next_row = 0
+            self._write = self._write_xlsxwriter_row
+        else:
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._write = self._sheet.append
+        self._write(self.columns)
+
+    def _write_xlsxwriter_row(self, row):
+        # 常量内存模式要求按行号顺序写入
+        self._sheet.write_row(self._next_row, 0, row)
+        self._next_row += 1
+
+    def write_frame(self, df):
+        """追加一个DataFrame块（列顺序与表头一致，空值写为空单元格）"""
+        values = df[self.columns].astype(object).where(df[self.columns].notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            self._write(list(row))
+            self.rows_written += 1
+
+    def close(self):
+        if hasattr(self, "_file"):
+            self._file.close()
+        elif self.backend == "xlsxwriter":
+            self._workbook.close()
+        else:
+            self._workbook.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
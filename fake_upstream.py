@@ -0,0 +1,206 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 生成模拟归属地数据用的省份、城市和运营商（按号段确定，同一号段每次返回相同结果）
+PROVINCES = [("北京", "北京"), ("上海", "上海"), ("广东", "广州"), ("广东", "深圳"), ("浙江", "杭州"),
+             ("江苏", "南京"), ("四川", "成都"), ("湖北", "武汉"), ("新疆", "阿克苏"), ("山东", "济南")]
+OPERATORS = {"13": "移动", "15": "联通", "17": "电信", "18": "移动", "19": "电信"}
+
+
+def default_payload(number):
+    """按号段生成固定的模拟归属地数据（格式与360 API的data字段一致）"""
+    digest = hashlib.md5(number[:7].encode()).digest()
+    province, city = PROVINCES[digest[0] % len(PROVINCES)]
+    return {"province": province, "city": city, "sp": OPERATORS.get(number[:2], "移动")}
+
+
+class _Server(ThreadingHTTPServer):
+    # 默认监听队列只有5，并发建立大量连接时多余的连接被丢弃、约1秒后才重试，会把建连等待误算成接口延迟
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class FakeUpstream:
+    """
+    本地模拟的360手机号归属地接口（phonearea.php），用于离线压测和调优并发参数
+    可配置响应延迟分布（基础延迟+抖动+慢请求长尾）、错误率、QPS限流（超出返回429）和返回数据
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.02, jitter=0.0, slow_rate=0.0, slow_latency=1.0,
+                 error_rate=0.0, fail_rate=0.0, qps=None, payloads=None, seed=None):
+        """
+        :param port: 监听端口，0表示自动选择空闲端口
+        :param latency: 基础响应延迟（秒）
+        :param jitter: 延迟抖动（秒），实际延迟在 latency±jitter 内均匀分布
+        :param slow_rate: 慢请求比例，慢请求的延迟为 slow_latency（用于模拟长尾）
+        :param error_rate: 返回HTTP 503的请求比例
+        :param fail_rate: 返回HTTP 200但 code≠0（查询失败）的请求比例
+        :param qps: 每秒最多处理的请求数，超出返回429（None表示不限流）
+        :param payloads: {号段前缀: data}，按最长前缀匹配，未匹配的号码使用 default_payload
+        :param seed: 随机数种子，便于复现同一组延迟和错误
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.qps = qps
+        self.payloads = payloads or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = (0, 0)  # (当前秒, 本秒已处理的请求数)
+        self.reset_stats()
+
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 支持长连接，与真实接口一致
+            disable_nagle_algorithm = True  # 响应头和响应体分两次写出，避免Nagle算法与延迟确认叠加造成约40ms延迟
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/__stats":
+                    self._send(200, upstream.stats())
+                else:
+                    self._send(*upstream.handle(parse_qs(url.query).get("number", [""])[0]))
+
+            def _send(self, status, body, headers=None):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/phonearea.php"
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = 0
+            self.ok = 0
+            self.errors = 0
+            self.failed = 0
+            self.throttled = 0
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "ok": self.ok, "errors": self.errors, "failed": self.failed,
+                    "throttled": self.throttled}
+
+    def _over_limit(self):
+        """按每秒固定窗口计数，判断本次请求是否超出QPS上限"""
+        if not self.qps:
+            return False
+        second = int(time.monotonic())
+        with self._lock:
+            window, count = self._window
+            if window != second:
+                window, count = second, 0
+            self._window = (window, count + 1)
+            return count >= self.qps
+
+    def _delay(self):
+        if self._random.random() < self.slow_rate:
+            return self.slow_latency
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _payload(self, number):
+        for length in range(len(number), 0, -1):
+            data = self.payloads.get(number[:length])
+            if data is not None:
+                return data
+        return default_payload(number)
+
+    def handle(self, number):
+        """处理一次查询，返回 (HTTP状态码, 响应内容, 响应头)"""
+        with self._lock:
+            self.calls += 1
+        if self._over_limit():
+            with self._lock:
+                self.throttled += 1
+            return 429, None, {"Retry-After": "1"}
+
+        time.sleep(self._delay())
+        roll = self._random.random()
+        with self._lock:
+            if roll < self.error_rate:
+                self.errors += 1
+                return 503, None, None
+            if roll < self.error_rate + self.fail_rate or not number:
+                self.failed += 1
+                return 200, {"code": 1, "msg": "查询失败"}, None
+            self.ok += 1
+        return 200, {"code": 0, "data": self._payload(number)}, None
+
+    def serve_forever(self):
+        """在当前线程中运行服务（阻塞）"""
+        self._server.serve_forever()
+
+    def start(self):
+        """在后台线程中启动服务，返回自身"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的360手机号归属地接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8360)
+    parser.add_argument("--latency", type=float, default=20, help="基础延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="延迟抖动（毫秒）")
+    parser.add_argument("--slow-rate", type=float, default=0, help="慢请求比例")
+    parser.add_argument("--slow-latency", type=float, default=1000, help="慢请求延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0, help="返回503的比例")
+    parser.add_argument("--fail-rate", type=float, default=0, help="返回code≠0的比例")
+    parser.add_argument("--qps", type=float, default=None, help="每秒最多处理的请求数，超出返回429")
+    parser.add_argument("--payloads", help="JSON文件：{号段前缀: data}")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    payloads = None
+    if args.payloads:
+        with open(args.payloads, "r", encoding="utf-8") as f:
+            payloads = json.load(f)
+
+    upstream = FakeUpstream(args.host, args.port, args.latency / 1000, args.jitter / 1000, args.slow_rate,
+                            args.slow_latency / 1000, args.error_rate, args.fail_rate, args.qps, payloads,
+                            args.seed)
+    print(f"模拟接口已启动：{upstream.url}（统计信息：/__stats）")
+    print(f"使用方法：设置环境变量 PHONE_API_URL={upstream.url} 后运行查询程序")
+    try:
+        upstream.serve_forever()
+    except KeyboardInterrupt:
+        print(f"已停止，共处理 {upstream.stats()['calls']} 个请求")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import lookup_trace
+from rate_limit import TokenBucket
+from resilience import CircuitBreaker, backoff_delay, is_retryable_error
+
+# 360手机号归属地API地址（可通过环境变量指向本地模拟服务做压测）
+API_URL = os.environ.get("PHONE_API_URL", "https://cx.shouji.360.cn/phonearea.php")
+
+# 默认连接池大小，DNS缓存时间（秒）与最多缓存的条目数
+DEFAULT_POOL_SIZE = 10
+DNS_CACHE_TTL = 300
+DNS_CACHE_SIZE = 64
+
+# 上游QPS上限（环境变量 PHONE_API_QPS / PHONE_API_BURST，未设置则不限速）
+DEFAULT_QPS = float(os.environ.get("PHONE_API_QPS", "0"))
+DEFAULT_BURST = float(os.environ.get("PHONE_API_BURST", "1"))
+
+# 临时故障（超时、连接失败、429/5xx）的默认重试次数
+DEFAULT_RETRIES = int(os.environ.get("PHONE_API_RETRIES", "2"))
+# 批量任务熔断时等待上游恢复的最长时间（秒），避免短时故障导致整批结果作废
+BATCH_CIRCUIT_WAIT = 120
+
+_session = None
+_pool_size = DEFAULT_POOL_SIZE
+_session_lock = threading.Lock()
+_rate_limiter = TokenBucket(DEFAULT_QPS, DEFAULT_BURST) if DEFAULT_QPS > 0 else None
+_circuit_breaker = CircuitBreaker()
+
+# ------------------- DNS缓存 -------------------
+_original_getaddrinfo = socket.getaddrinfo
+_dns_cache = OrderedDict()  # {查询参数: (解析时间, 结果)}，按解析时间先后排列
+_dns_lock = threading.Lock()
+
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    """带TTL的getaddrinfo，同一主机在有效期内只解析一次"""
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    with _dns_lock:
+        entry = _dns_cache.get(key)
+        if entry is not None and now - entry[0] < DNS_CACHE_TTL:
+            return entry[1]
+    result = _original_getaddrinfo(host, port, family, type, proto, flags)
+    with _dns_lock:
+        _dns_cache.pop(key, None)
+        _dns_cache[key] = (now, result)
+        # 清理过期条目，条目数超过上限时淘汰最早解析的
+        while _dns_cache:
+            oldest_key, (resolved_at, _) = next(iter(_dns_cache.items()))
+            if now - resolved_at < DNS_CACHE_TTL and len(_dns_cache) <= DNS_CACHE_SIZE:
+                break
+            del _dns_cache[oldest_key]
+    return result
+
+
+def enable_dns_cache():
+    """
+    启用进程内DNS缓存（替换整个进程的 socket.getaddrinfo，重复调用无副作用）
+    只应在程序入口调用，作为模块被导入时不改变进程的DNS解析行为
+    """
+    socket.getaddrinfo = _cached_getaddrinfo
+
+
+def disable_dns_cache():
+    socket.getaddrinfo = _original_getaddrinfo
+    clear_dns_cache()
+
+
+def clear_dns_cache():
+    with _dns_lock:
+        _dns_cache.clear()
+
+
+# ------------------- 连接池 -------------------
+def _create_session(pool_size):
+    """创建共享Session：长连接池大小与并发数一致，且不保存Cookie，避免多线程共享可变状态"""
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(pool_size=DEFAULT_POOL_SIZE):
+    """
+    按并发数重建共享连接池
+    :param pool_size: 连接池大小，一般与线程数/并发数一致
+    """
+    global _session, _pool_size
+    with _session_lock:
+        if _session is not None and pool_size == _pool_size:
+            return
+        old_session = _session
+        _pool_size = max(1, int(pool_size))
+        _session = _create_session(_pool_size)
+    if old_session is not None:
+        old_session.close()
+
+
+def get_session():
+    """获取共享Session（首次调用时按当前配置创建）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _create_session(_pool_size)
+        return _session
+
+
+# ------------------- 限流 -------------------
+def set_rate_limit(qps, burst=1):
+    """
+    设置所有上游请求共享的QPS上限
+    :param qps: 每秒最大请求数，None或<=0表示不限速
+    :param burst: 允许的突发请求数
+    """
+    global _rate_limiter
+    _rate_limiter = TokenBucket(qps, burst) if qps and qps > 0 else None
+
+
+def get_rate_limiter():
+    """当前生效的令牌桶（未限速时为None）"""
+    return _rate_limiter
+
+
+def get_circuit_breaker():
+    """所有上游请求共享的熔断器"""
+    return _circuit_breaker
+
+
+def _retry_delay(exc, attempt):
+    """重试等待时间：指数退避+抖动，429响应带Retry-After时以其为准"""
+    delay = backoff_delay(attempt)
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+    return delay
+
+
+# ------------------- 请求 -------------------
+def get(url=API_URL, params=None, timeout=10, retries=DEFAULT_RETRIES, circuit_wait=0):
+    """
+    通过共享连接池发送GET请求（受QPS上限和熔断器约束）
+    临时故障按指数退避+抖动重试，非2xx响应最终以 requests.HTTPError 抛出，熔断中抛出 CircuitOpenError
+    :param retries: 临时故障的最大重试次数
+    :param circuit_wait: 熔断中最多等待上游恢复的秒数，0表示立即失败（适合在线请求）
+    :return: requests.Response
+    """
+    for attempt in range(retries + 1):
+        queued_at = time.perf_counter()
+        _circuit_breaker.before_call(circuit_wait)
+        limiter = _rate_limiter
+        if limiter is not None:
+            limiter.acquire()
+
+        lookup_trace.start_attempt(attempt + 1, queued_at)
+        try:
+            response = get_session().get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            lookup_trace.end_attempt(error=e)
+            if not is_retryable_error(e):
+                if getattr(e, "response", None) is not None:
+                    _circuit_breaker.record_success()  # 上游有正常应答（如4xx），不计入熔断
+                else:
+                    _circuit_breaker.release()  # 上游未应答（如URL无效），熔断器状态不变
+                raise
+            _circuit_breaker.record_failure()
+            if attempt == retries:
+                raise
+            time.sleep(_retry_delay(e, attempt))
+            continue
+
+        lookup_trace.end_attempt(response)
+        _circuit_breaker.record_success()
+        return response
+
@@ -0,0 +1,216 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+
+import pandas as pd
+
+import excel_stream
+from phone_column import clean_phone_column
+import 号码归属地查询并发版 as batch_engine
+
+# 任务文件（上传的原文件与结果文件）存放目录，已结束的任务保留 JOB_RETENTION 秒后清理
+JOBS_DIR = os.path.join(tempfile.gettempdir(), "phone_area_jobs")
+JOB_RETENTION = 24 * 3600
+# 未指定电话列时，按表头关键字自动识别（与网页端规则一致）
+PHONE_HEADER_KEYWORDS = ("联系电话", "手机号码")
+
+
+class Job:
+    """
+    后台查询任务：读取上传的Excel，使用批量查询引擎（号段去重、自适应并发、缓存、重试）查询，
+    结果写入联系电话列的后两列；22位号码拆分为两行，与网页端处理规则一致
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, file_name, phone_column=None, max_workers=15):
+        """
+        :param file_name: 上传的原始文件名（用于生成下载文件名）
+        :param phone_column: 电话列序号（从0开始），None表示按表头自动识别
+        :param max_workers: 最大并发数（自适应并发的上限）
+        """
+        self.id = uuid.uuid4().hex
+        self.file_name = file_name
+        self.phone_column = phone_column
+        self.max_workers = max_workers
+        self.dir = os.path.join(JOBS_DIR, self.id)
+        self.input_path = os.path.join(self.dir, "input" + os.path.splitext(file_name)[1].lower())
+        self.output_path = os.path.join(self.dir, "result.xlsx")
+        self.state = self.QUEUED
+        self.total = 0
+        self.completed = 0
+        self.errors = 0
+        self.message = ""
+        self.log = deque(maxlen=20)  # 最近的处理记录
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # 状态或进度变化时通知等待中的进度推送
+        self._version = 0  # 每次变化加1
+        os.makedirs(self.dir, exist_ok=True)
+
+    @property
+    def download_name(self):
+        return f"{os.path.splitext(self.file_name)[0]}_已查询.xlsx"
+
+    @property
+    def finished(self):
+        return self.state in (self.DONE, self.FAILED)
+
+    def snapshot(self):
+        """任务当前状态（用于状态查询和进度推送）"""
+        with self._lock:
+            return {
+                "id": self.id,
+                "state": self.state,
+                "file_name": self.file_name,
+                "total": self.total,
+                "completed": self.completed,
+                "errors": self.errors,
+                "message": self.message,
+                "log": list(self.log),
+            }
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        等待任务在 version 之后发生变化（进度推送无需轮询）
+        :param version: 上次得到的版本号
+        :param timeout: 最长等待秒数
+        :return: 最新的版本号（超时仍无变化时与 version 相同）
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._version != version, timeout)
+            return self._version
+
+    def wait_finished(self, timeout=None):
+        """等待任务结束，最多等待 timeout 秒，返回任务是否已结束"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.finished, timeout)
+
+    def _notify(self):
+        """记录一次变化并唤醒等待者（调用时需持有 _lock）"""
+        self._version += 1
+        self._changed.notify_all()
+
+    def _advance(self, rows, ok, message):
+        with self._lock:
+            self.completed += rows
+            if not ok:
+                self.errors += rows
+            self.log.append(message)
+            self._notify()
+
+    def run(self):
+        with self._lock:
+            self.state = self.RUNNING
+            self._notify()
+        try:
+            self._process()
+            state, message = self.DONE, self.message
+        except Exception as e:
+            state, message = self.FAILED, str(e)
+        with self._lock:
+            self.message = message
+            self.finished_at = time.time()
+            self.state = state
+            self._notify()
+
+    def _process(self):
+        # 按网页端的方式读取：第一行为表头，其余为数据，列按序号定位
+        grid = pd.read_excel(self.input_path, header=None, dtype=object)
+        if grid.empty:
+            raise ValueError("文件中没有数据")
+        header = grid.iloc[0]
+        body = grid.iloc[1:]
+
+        phone_column = self.phone_column
+        if phone_column is None:
+            matches = [i for i, text in enumerate(header)
+                       if isinstance(text, str) and any(word in text for word in PHONE_HEADER_KEYWORDS)]
+            if not matches:
+                raise ValueError('未找到包含"联系电话"或"手机号码"的列')
+            phone_column = matches[0]
+        if not 0 <= phone_column < grid.shape[1]:
+            raise ValueError("电话列超出表格范围")
+        location_column, operator_column = phone_column + 1, phone_column + 2
+
+        # 补齐归属地、运营商列及缺失的表头
+        columns = range(max(grid.shape[1], operator_column + 1))
+        header = header.reindex(columns)
+        body = body.reindex(columns=columns).astype(object)
+        for column, title in ((location_column, "归属地"), (operator_column, "运营商")):
+            if pd.isna(header[column]) or not str(header[column]).strip():
+                header[column] = title
+
+        # 22位号码拆分为两个11位号码，各占一行，其余列数据复制
+        cleaned = clean_phone_column(body[phone_column])
+        pairs = cleaned.str.len().eq(22)
+        numbers = cleaned.where(~pairs, cleaned.str[:11] + " " + cleaned.str[11:]).str.split(" ")
+        rows = body.assign(_number=numbers, _pair=pairs).explode("_number").reset_index(drop=True)
+        rows.loc[rows["_pair"], phone_column] = rows.loc[rows["_pair"], "_number"]
+
+        # 空号码不处理，其余号码按号段去重后查询；无效号码无需查询，直接计入
+        has_number = rows["_number"].ne("")
+        invalid = int((has_number & ~rows["_number"].str.fullmatch(r"\d{11}")).sum())
+        with self._lock:
+            self.total = int(has_number.sum())
+            self.completed = self.errors = invalid
+            self._notify()
+
+        def progress(count, info):
+            location, operator = info
+            self._advance(count, batch_engine.is_lookup_ok(info), f"{location}, {operator}（{count} 个号码）")
+
+        results = batch_engine.lookup_phone_column(rows.loc[has_number, "_number"], self.max_workers,
+                                                   progress=progress)
+        rows.loc[has_number, location_column] = results["归属地"]
+        rows.loc[has_number, operator_column] = results["运营商"]
+        with self._lock:
+            self.completed = self.total
+            self._notify()
+
+        output = pd.concat([header.to_frame().T, rows[header.index]], ignore_index=True)
+        output.to_excel(self.output_path, header=False, index=False,
+                        engine=excel_stream.available_writer_backends()[-1])
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _purge_expired():
+    """清理超过保留期的已结束任务及其文件"""
+    now = time.time()
+    with _jobs_lock:
+        expired = [job for job in _jobs.values() if job.finished and now - job.finished_at > JOB_RETENTION]
+        for job in expired:
+            del _jobs[job.id]
+    for job in expired:
+        shutil.rmtree(job.dir, ignore_errors=True)
+
+
+def create_job(file_name, save, phone_column=None, max_workers=15):
+    """
+    创建并在后台线程中启动查询任务
+    :param file_name: 上传的原始文件名
+    :param save: save(path)，将上传的文件保存到指定路径
+    :return: Job
+    """
+    _purge_expired()
+    job = Job(file_name, phone_column, max_workers)
+    save(job.input_path)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    threading.Thread(target=job.run, daemon=True).start()
+    return job
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,286 @@
+"""
+批量查询的逐号码耗时追踪（默认关闭）
+设置环境变量 PHONE_TRACE_PATH=trace.jsonl（或调用 enable(path)）后，每次 get_phone_info 查询写入一行JSON：
+号码、结果分类、来源（本地号段表/缓存或API）、总耗时、JSON解析耗时，以及每次请求尝试的
+排队等待（限流/熔断）、DNS、建立连接、TLS握手、服务端等待（发出请求到收到响应头）、接收响应体耗时和状态
+DNS、建连和TLS耗时只在新建连接时产生，复用长连接的请求这几项为0；启用DNS缓存时命中缓存的解析耗时接近0
+只追踪经过 http_client.get 的多线程查询路径，asyncio引擎（async_engine）的查询不产生追踪记录
+
+汇总：python lookup_trace.py trace.jsonl --top 20
+"""
+import argparse
+import contextlib
+import functools
+import json
+import os
+import socket
+import threading
+import time
+
+# 设置后自动开启追踪，结果追加写入该文件（JSONL）
+TRACE_PATH = os.environ.get("PHONE_TRACE_PATH")
+# 查询结果前缀与结果分类（与 get_phone_info 的返回值一致）
+OUTCOME_PREFIXES = (("无效手机号", "invalid"), ("API查询失败", "failed"), ("网络错误", "network_error"),
+                    ("解析错误", "parse_error"))
+# 单次请求尝试的阶段：排队等待、DNS、建连、TLS握手、服务端等待、接收响应体
+PHASES = ("wait", "dns", "connect", "tls", "server", "transfer")
+
+_local = threading.local()
+_file = None
+_file_lock = threading.Lock()
+_restore = []  # 关闭追踪时需要还原的 (对象, 属性名, 原值)
+_NULL = contextlib.nullcontext()
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+# ------------------- 开关 -------------------
+def _patch(owner, name, make_wrapper):
+    original = getattr(owner, name)
+    _restore.append((owner, name, original))
+    setattr(owner, name, make_wrapper(original))
+
+
+def _install_hooks():
+    """统计建立连接与TLS握手耗时（仅在开启追踪时替换urllib3的对应函数）"""
+    import urllib3.connection
+    import urllib3.util.connection
+
+    def wrap_create_connection(original):
+        @functools.wraps(original)
+        def create_connection(address, *args, **kwargs):
+            attempt = getattr(_local, "attempt", None)
+            if attempt is None:
+                return original(address, *args, **kwargs)
+            # 先单独解析域名并计入DNS耗时，再按解析出的地址依次尝试建立TCP连接（与urllib3的做法一致）
+            host, port = address
+            start = time.perf_counter()
+            try:
+                addresses = socket.getaddrinfo(host.strip("[]"), port, urllib3.util.connection.allowed_gai_family(),
+                                               socket.SOCK_STREAM)
+            finally:
+                attempt["dns"] += time.perf_counter() - start
+            start = time.perf_counter()
+            try:
+                error = None
+                for *_, sockaddr in addresses:
+                    try:
+                        return original((sockaddr[0], port), *args, **kwargs)
+                    except OSError as e:
+                        error = e
+                raise error
+            finally:
+                attempt["connect"] += time.perf_counter() - start
+        return create_connection
+
+    def wrap_https_connect(original):
+        @functools.wraps(original)
+        def connect(self):
+            attempt = getattr(_local, "attempt", None)
+            if attempt is None:
+                return original(self)
+            before = attempt["dns"] + attempt["connect"]
+            start = time.perf_counter()
+            try:
+                return original(self)
+            finally:
+                attempt["tls"] += time.perf_counter() - start - (attempt["dns"] + attempt["connect"] - before)
+        return connect
+
+    _patch(urllib3.util.connection, "create_connection", wrap_create_connection)
+    _patch(urllib3.connection.HTTPSConnection, "connect", wrap_https_connect)
+
+
+def enable(path):
+    """开启追踪，记录追加写入 path"""
+    global _file
+    with _file_lock:
+        if _file is not None:
+            return
+        _file = open(path, "a", encoding="utf-8")
+        _install_hooks()
+
+
+def disable():
+    global _file
+    with _file_lock:
+        while _restore:
+            owner, name, original = _restore.pop()
+            setattr(owner, name, original)
+        if _file is not None:
+            _file.close()
+            _file = None
+
+
+def enabled():
+    return _file is not None
+
+
+def _write(record):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _file_lock:
+        if _file is not None:
+            _file.write(line)
+            _file.flush()
+
+
+# ------------------- 记录 -------------------
+def _outcome(info):
+    location = info[0] if isinstance(info, tuple) and info else ""
+    for prefix, outcome in OUTCOME_PREFIXES:
+        if location.startswith(prefix):
+            return outcome
+    return "ok"
+
+
+def traced_lookup(func):
+    """装饰 get_phone_info(phone_number)：开启追踪时记录该次查询的耗时明细，未开启时直接调用"""
+    @functools.wraps(func)
+    def wrapper(phone_number, *args, **kwargs):
+        if _file is None:
+            return func(phone_number, *args, **kwargs)
+
+        record = {"ts": round(time.time(), 3), "number": phone_number, "outcome": "exception",
+                  "source": "local", "total_ms": 0.0, "parse_ms": 0.0, "attempts": []}
+        _local.record = record
+        start = time.perf_counter()
+        try:
+            info = func(phone_number, *args, **kwargs)
+            record["outcome"] = _outcome(info)
+            return info
+        finally:
+            _local.record = _local.attempt = None
+            record["total_ms"] = _ms(time.perf_counter() - start)
+            if record["attempts"]:
+                record["source"] = "api"
+            _write(record)
+    return wrapper
+
+
+@contextlib.contextmanager
+def _timed_phase(record, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record[f"{name}_ms"] = round(record.get(f"{name}_ms", 0.0) + _ms(time.perf_counter() - start), 2)
+
+
+def phase(name):
+    """统计当前查询中某一步骤的耗时（如 parse），未开启追踪时不做任何事"""
+    record = getattr(_local, "record", None)
+    if record is None:
+        return _NULL
+    return _timed_phase(record, name)
+
+
+def start_attempt(number, queued_at):
+    """
+    开始一次上游请求尝试（由 http_client.get 调用）
+    :param number: 第几次尝试（从1开始）
+    :param queued_at: 开始等待限流/熔断的时间（time.perf_counter）
+    """
+    record = getattr(_local, "record", None)
+    if record is None:
+        return
+    now = time.perf_counter()
+    _local.attempt = {"attempt": number, "started": now, "wait": now - queued_at,
+                      "dns": 0.0, "connect": 0.0, "tls": 0.0}
+
+
+def end_attempt(response=None, error=None):
+    """结束当前请求尝试：记录各阶段耗时和HTTP状态码或异常类型"""
+    attempt = getattr(_local, "attempt", None)
+    record = getattr(_local, "record", None)
+    if attempt is None or record is None:
+        return
+    _local.attempt = None
+    total = time.perf_counter() - attempt.pop("started")
+    if response is None and error is not None:
+        response = getattr(error, "response", None)
+    # response.elapsed 为发出请求到收到响应头的时间（含建连），扣除建连部分即为服务端等待
+    network = attempt["dns"] + attempt["connect"] + attempt["tls"]
+    server = response.elapsed.total_seconds() - network if response is not None else total - network
+    attempt["server"] = max(0.0, server)
+    attempt["transfer"] = max(0.0, total - network - attempt["server"])
+    entry = {"attempt": attempt["attempt"], **{f"{name}_ms": _ms(attempt[name]) for name in PHASES},
+             "total_ms": _ms(total)}
+    if response is not None:
+        entry["status"] = response.status_code
+    if error is not None:
+        entry["error"] = type(error).__name__
+    record["attempts"].append(entry)
+
+
+# ------------------- 汇总 -------------------
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))] if ordered else 0.0
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records, top=10):
+    """打印结果分布、各阶段耗时（平均/p50/p99/占比）和最慢的号码"""
+    if not records:
+        print("没有追踪记录")
+        return
+
+    outcomes, sources = {}, {}
+    for record in records:
+        outcomes[record["outcome"]] = outcomes.get(record["outcome"], 0) + 1
+        sources[record["source"]] = sources.get(record["source"], 0) + 1
+    print(f"共 {len(records)} 次查询")
+    print("结果：" + "，".join(f"{name} {count}" for name, count in sorted(outcomes.items(), key=lambda x: -x[1])))
+    print("来源：" + "，".join(f"{name} {count}" for name, count in sorted(sources.items(), key=lambda x: -x[1])))
+
+    api = [record for record in records if record["source"] == "api"]
+    if api:
+        attempts = [attempt for record in api for attempt in record["attempts"]]
+        retried = sum(1 for record in api if len(record["attempts"]) > 1)
+        print(f"\nAPI查询 {len(api)} 次，请求 {len(attempts)} 次，其中 {retried} 次查询发生重试")
+
+        # backoff：重试前的退避等待（查询总耗时中不属于任何一次请求尝试的部分）
+        backoff = [max(0.0, record["total_ms"] - record["parse_ms"]
+                       - sum(attempt["wait_ms"] + attempt["total_ms"] for attempt in record["attempts"]))
+                   for record in api]
+        columns = [(name, [attempt[f"{name}_ms"] for attempt in attempts]) for name in PHASES]
+        columns.append(("parse", [record["parse_ms"] for record in api]))
+        columns.append(("backoff", backoff))
+        columns.append(("total", [record["total_ms"] for record in api]))
+        grand_total = sum(columns[-1][1]) or 1
+        print(f"{'阶段':<10}{'平均(ms)':>12}{'p50(ms)':>12}{'p99(ms)':>12}{'占比':>8}")
+        for name, values in columns:
+            share = "" if name == "total" else f"{sum(values) / grand_total:.1%}"
+            print(f"{name:<10}{sum(values) / len(values):>12.2f}{_percentile(values, 50):>12.2f}"
+                  f"{_percentile(values, 99):>12.2f}{share:>8}")
+
+    print(f"\n最慢的 {min(top, len(records))} 个号码：")
+    for record in sorted(records, key=lambda r: -r["total_ms"])[:top]:
+        phases = {name: sum(attempt[f"{name}_ms"] for attempt in record["attempts"]) for name in PHASES}
+        phases["parse"] = record["parse_ms"]
+        slowest = max(phases, key=phases.get)
+        detail = f"，最耗时阶段 {slowest} {phases[slowest]:.1f}ms" if record["attempts"] else ""
+        errors = [attempt.get("status") or attempt.get("error") for attempt in record["attempts"]]
+        print(f"  {record['number']}  {record['total_ms']:.1f}ms  {record['outcome']}  "
+              f"尝试 {len(record['attempts'])} 次{detail}" + (f"  {errors}" if len(errors) > 1 else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="汇总查询耗时追踪记录（PHONE_TRACE_PATH 生成的JSONL）")
+    parser.add_argument("path", help="追踪记录文件")
+    parser.add_argument("--top", type=int, default=10, help="列出最慢的号码数量")
+    args = parser.parse_args()
+    summarize(load(args.path), args.top)
+
+
+if TRACE_PATH:
+    enable(TRACE_PATH)
+
+if __name__ == "__main__":
+    main()
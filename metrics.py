@@ -0,0 +1,193 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus文本格式（/metrics 响应的Content-Type）
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# 延迟直方图的分桶上界（秒）：覆盖缓存命中（毫秒级）到上游超时（5秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指标基类：按标签值分组保存数据，创建时注册到全局列表，由 render() 统一输出"""
+
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labels and self.type in ("counter", "gauge"):
+            self._values[()] = 0  # 无标签的计数器/当前值从0开始输出
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, label_values):
+        if len(label_values) != len(self.labels):
+            raise ValueError(f"{self.name} 需要标签 {self.labels}")
+        return tuple(str(value) for value in label_values)
+
+    def _samples(self):
+        """返回 [(名称后缀, 标签值, 额外标签, 数值)]"""
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, key, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labels, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type = "counter"
+
+    def inc(self, *label_values, amount=1):
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    type = "gauge"
+
+    def inc(self, *label_values, amount=1):
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    @contextmanager
+    def track(self, *label_values):
+        """with块执行期间值加1（用于统计进行中的请求数）"""
+        self.inc(*label_values)
+        try:
+            yield
+        finally:
+            self.dec(*label_values)
+
+
+class Histogram(_Metric):
+    """分桶直方图：记录各区间的次数、总和与总次数，可在Prometheus中计算p50/p99"""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        key = self._key(label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            data[0][index] += 1
+            data[1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        """记录with块的执行耗时（秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def _samples(self):
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append(("_bucket", key, (("le", le),), cumulative))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), cumulative))
+        return samples
+
+
+class CallbackMetric(_Metric):
+    """输出时才调用 func 取值的指标，用于导出其他模块已有的统计（如缓存命中数）"""
+
+    def __init__(self, name, documentation, labels, func, kind="gauge"):
+        """
+        :param func: 无参函数，返回 {标签值元组: 数值}
+        :param kind: 指标类型（gauge 或 counter）
+        """
+        super().__init__(name, documentation, labels)
+        self.type = kind
+        self._func = func
+
+    def _samples(self):
+        return [("", self._key(key), (), value) for key, value in self._func().items()]
+
+
+def render():
+    """所有已注册指标的Prometheus文本"""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ------------------- HTTP请求指标 -------------------
+HTTP_LATENCY = Histogram("phone_http_request_duration_seconds", "代理服务处理请求的耗时", ("endpoint",))
+HTTP_RESPONSES = Counter("phone_http_responses_total", "代理服务按状态码统计的响应数", ("endpoint", "status"))
+HTTP_IN_FLIGHT = Gauge("phone_http_requests_in_flight", "代理服务正在处理的请求数")
+
+
+def instrument(app):
+    """为Flask应用记录每个请求的耗时、状态码和进行中的请求数（按路由规则分组，标签数量有限）"""
+    from flask import g, request
+
+    def endpoint():
+        return request.url_rule.rule if request.url_rule is not None else "other"
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _count_response(response):
+        HTTP_RESPONSES.inc(endpoint(), response.status_code)
+        return response
+
+    @app.teardown_request
+    def _stop_timer(exc):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_LATENCY.observe(time.perf_counter() - started, endpoint())
+
+    return app
@@ -1,23 +1,13 @@
 import pandas as pd
 import requests
-import re
-import time
-
-
-def clean_phone_number(phone):
-    """
-    清洗手机号码：去除非数字字符（空格、横线、括号等），返回纯数字
-    :param phone: 原始手机号码（字符串/数值类型）
-    :return: 清洗后的纯数字手机号（字符串）
-    """
-    if pd.isna(phone):  # 处理空值
-        return ""
-    # 转为字符串后，只保留数字
-    phone_str = str(phone)
-    cleaned = re.sub(r"\D", "", phone_str)  # 正则匹配非数字字符并删除
-    return cleaned
+import segment_db
+import result_cache
+import http_client
+import lookup_trace
+from phone_column import clean_phone_column
 
 
+@lookup_trace.traced_lookup
 def get_phone_info(phone_number):
     """
     调用360手机号归属地API，获取归属地（省份+城市）和运营商
@@ -28,30 +18,36 @@ def get_phone_info(phone_number):
     if len(phone_number) != 11 or not phone_number.isdigit():
         return ("无效手机号", "无效手机号")
 
-    # 2. 构造API请求URL（使用你指定的360 API）
-    api_url = f"https://cx.shouji.360.cn/phonearea.php?number={phone_number}"
-
     try:
-        # 发送GET请求（添加0.5秒延迟，避免高频请求被限制）
-        time.sleep(0.5)
-        response = requests.get(api_url, timeout=10)  # 超时时间10秒
-        response.raise_for_status()  # 若HTTP状态码非200（如404、500），抛出异常
-
-        # 3. 解析API返回的JSON数据
-        result = response.json()
-
-        # 4. 提取归属地和运营商（判断API返回是否正常）
-        if result.get("code") == 0:  # code=0表示查询成功
+        # 2. 优先查询本地号段表，其次查询本地缓存，都未命中才请求API
+        data = segment_db.lookup(phone_number)
+        if data is None:
+            data = result_cache.get(phone_number)
+
+        if data is None:
+            # 通过共享连接池请求360 API（由令牌桶控制请求频率，避免高频请求被限制）
+            response = http_client.get(params={"number": phone_number}, timeout=10,
+                                       circuit_wait=http_client.BATCH_CIRCUIT_WAIT)  # 超时时间10秒，熔断时等待恢复
+            # 非2xx响应在重试用尽后由 http_client.get 抛出 HTTPError，在下方统一按网络错误处理
+
+            # 解析API返回的JSON数据
+            with lookup_trace.phase("parse"):
+                result = response.json()
+
+            # 判断API返回是否正常
+            if result.get("code") != 0:  # code=0表示查询成功
+                # API返回错误（如code≠0）
+                return ("API查询失败", "API查询失败")
             data = result.get("data", {})
-            province = data.get("province", "")  # 省份（如"新疆"）
-            city = data.get("city", "")  # 城市（如"阿克苏"）
-            sp = data.get("sp", "")  # 运营商（如"电信"）
-            location = f"{province}{city}" if (province and city) else "未知地区"
-            operator = sp if sp else "未知运营商"
-            return (location, operator)
-        else:
-            # API返回错误（如code≠0）
-            return ("API查询失败", "API查询失败")
+            result_cache.put(phone_number, data)  # 写入缓存，下次运行直接命中
+
+        # 3. 提取归属地和运营商
+        province = data.get("province", "")  # 省份（如"新疆"）
+        city = data.get("city", "")  # 城市（如"阿克苏"）
+        sp = data.get("sp", "")  # 运营商（如"电信"）
+        location = f"{province}{city}" if (province and city) else "未知地区"
+        operator = sp if sp else "未知运营商"
+        return (location, operator)
 
     except requests.exceptions.RequestException as e:
         # 捕获网络异常（超时、连接失败等）
@@ -61,12 +57,22 @@ def get_phone_info(phone_number):
         return (f"解析错误: {str(e)[:20]}", f"解析错误: {str(e)[:20]}")
 
 
-def batch_query_excel(excel_path):
+def batch_query_excel(excel_path, segment_path=None, qps=2.0, burst=1):
     """
     批量处理Excel：读取手机号码，查询归属地，写入F列（归属地）和G列（运营商）
     :param excel_path: Excel文件路径（如"./phone_list.xlsx"）
+    :param segment_path: 号段数据文件路径（CSV/JSON，可选），收录的号段直接本地查询，未收录的才请求API
+    :param qps: 每秒最多请求API的次数（默认2次，即平均每0.5秒一次）
+    :param burst: 允许的突发请求数
     """
+    http_client.set_rate_limit(qps, burst)
+
     try:
+        # 0. 加载本地号段表（可选）
+        if segment_path:
+            segment_index = segment_db.load_default_index(segment_path)
+            print(f"✅ 已加载本地号段表，共{len(segment_index)}个号段")
+
         # 1. 读取Excel文件（使用openpyxl引擎，支持写入）
         # 假设表头为：序号、姓名、性别、民族、联系电话、归属地、运营商（对应列A-G）
         df = pd.read_excel(excel_path, engine="openpyxl")
@@ -77,28 +83,34 @@ def batch_query_excel(excel_path):
             print("❌ Excel表头不符合要求！需包含：序号、姓名、性别、民族、联系电话、归属地、运营商")
             return
 
-        # 3. 批量处理每一行的手机号码
+        # 3. 整列清洗并校验手机号码（清洗后应为11位数字），无效号码不再逐个调用查询
         print(f"✅ 成功读取Excel，共{len(df)}行数据，开始查询归属地...")
-        for index, row in df.iterrows():
-            # 获取当前行的手机号码并清洗
-            original_phone = row["联系电话"]
-            cleaned_phone = clean_phone_number(original_phone)
+        cleaned_phones = clean_phone_column(df["联系电话"])
+        valid = cleaned_phones.str.fullmatch(r"\d{11}")
+        valid_phones = cleaned_phones[valid]
 
-            # 查询归属地和运营商
+        # 4. 逐个查询有效号码的归属地和运营商
+        results = []
+        for count, cleaned_phone in enumerate(valid_phones, start=1):
             location, operator = get_phone_info(cleaned_phone)
+            results.append((location, operator))
 
-            # 写入F列（归属地）和G列（运营商）
-            df.at[index, "归属地"] = location
-            df.at[index, "运营商"] = operator
-
-            # 打印进度（每10行打印一次，避免输出过多）
-            if (index + 1) % 10 == 0 or (index + 1) == len(df):
+            # 打印进度（每10个号码打印一次，避免输出过多）
+            if count % 10 == 0 or count == len(valid_phones):
                 print(
-                    f"进度：{index + 1}/{len(df)} 行完成 | 手机号：{cleaned_phone} → 归属地：{location}，运营商：{operator}")
+                    f"进度：{count}/{len(valid_phones)} 个号码完成 | 手机号：{cleaned_phone} → 归属地：{location}，运营商：{operator}")
+
+        # 5. 整列写入F列（归属地）和G列（运营商），无效号码填充提示
+        result_df = pd.DataFrame(results, index=valid_phones.index, columns=["归属地", "运营商"])
+        result_df = result_df.reindex(df.index, fill_value="无效手机号")
+        df["归属地"] = result_df["归属地"]
+        df["运营商"] = result_df["运营商"]
 
-        # 4. 保存处理后的Excel文件（覆盖原文件，建议先备份原文件）
+        # 6. 保存处理后的Excel文件（覆盖原文件，建议先备份原文件）
         df.to_excel(excel_path, index=False, engine="openpyxl")
         print(f"\n🎉 处理完成！文件已保存至：{excel_path}")
+        cache_stats = result_cache.stats()
+        print(f"📦 缓存命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次（命中率 {cache_stats['hit_ratio']:.1%}）")
 
     except FileNotFoundError:
         print(f"❌ 未找到文件：{excel_path}，请检查路径是否正确")
@@ -110,6 +122,9 @@ def batch_query_excel(excel_path):
 if __name__ == "__main__":
     # 提示用户输入Excel文件路径（示例：./phone_list.xlsx 或 C:/data/phone.xlsx）
     excel_path = input("请输入Excel文件的完整路径（例如：./phone_list.xlsx）：").strip()
+    # 号段数据文件可留空，留空则全部通过API查询
+    segment_path = input("请输入号段数据文件路径（CSV/JSON，可留空）：").strip()
 
-    # 启动批量处理
-    batch_query_excel(excel_path)
\ No newline at end of file
+    # 启动批量处理（同一主机只解析一次DNS）
+    http_client.enable_dns_cache()
+    batch_query_excel(excel_path, segment_path or None)
\ No newline at end of file
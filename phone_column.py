@@ -0,0 +1,19 @@
+import pandas as pd
+
+
+def clean_phone_column(phones):
+    """
+    整列清洗手机号码：去除非数字字符（空格、横线、括号等），整列一次完成，无需逐行处理
+    :param phones: 原始手机号码列（字符串/数值类型的Series）
+    :return: 清洗后的纯数字手机号Series（空值为空字符串）
+    """
+    if pd.api.types.is_float_dtype(phones):
+        # 含空值的数字列会被读成浮点数（如13800000000.0），先转回整数，避免多出的".0"变成数字
+        phones = phones.round().astype("Int64")
+    cleaned = phones.astype("string")
+    if phones.dtype == object:
+        # 文本与数字混合的列中，数字单元格仍是浮点数，同样去掉末尾的".0"
+        cleaned = cleaned.str.replace(r"\.0+$", "", regex=True)
+    # 转为字符串后，只保留数字
+    cleaned = cleaned.str.replace(r"\D", "", regex=True)  # 正则匹配非数字字符并删除
+    return cleaned.fillna("").astype(object)
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+import http_client
+import metrics
+import result_cache
+from resilience import CircuitOpenError
+
+# 代理内存缓存的容量与有效期（秒），可通过环境变量调整
+DEFAULT_MEMORY_SIZE = int(os.environ.get("PHONE_PROXY_CACHE_SIZE", "10000"))
+DEFAULT_MEMORY_TTL = float(os.environ.get("PHONE_PROXY_CACHE_TTL", "3600"))
+
+
+class LRUCache:
+    """线程安全的内存LRU缓存：超过maxsize时淘汰最久未使用的条目，条目写入ttl秒后失效"""
+
+    def __init__(self, maxsize=DEFAULT_MEMORY_SIZE, ttl=DEFAULT_MEMORY_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # {键: (值, 过期时间)}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """读取缓存，未命中或已过期时返回None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+class _Call:
+    """一次进行中的调用，等待者通过event获取其结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """请求合并：同一个键同时只执行一次调用，期间到达的相同请求等待并共享这次调用的结果"""
+
+    def __init__(self):
+        self.coalesced = 0  # 被合并（未实际执行）的调用次数
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """执行 func(*args)；键相同的调用正在进行时，等待其完成并返回相同结果（或抛出相同异常）"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+_memory_cache = LRUCache()
+_flight = SingleFlight()
+
+# 查询结果：ok 成功 / invalid 无效号码 / failed 上游返回code≠0 / upstream_error 上游请求失败 /
+# timeout 上游超时 / circuit_open 熔断中被拒绝
+LOOKUPS = metrics.Counter("phone_lookups_total", "代理查询次数（按结果分类）", ("outcome",))
+UPSTREAM_LATENCY = metrics.Histogram("phone_upstream_request_duration_seconds", "转发到上游API的耗时（含重试）")
+UPSTREAM_IN_FLIGHT = metrics.Gauge("phone_upstream_requests_in_flight", "正在进行的上游请求数")
+
+
+def _cache_stats(field):
+    return {("memory",): _memory_cache.stats()[field], ("sqlite",): result_cache.stats()[field]}
+
+
+metrics.CallbackMetric("phone_cache_hits_total", "缓存命中次数", ("cache",),
+                       lambda: _cache_stats("hits"), kind="counter")
+metrics.CallbackMetric("phone_cache_misses_total", "缓存未命中次数", ("cache",),
+                       lambda: _cache_stats("misses"), kind="counter")
+metrics.CallbackMetric("phone_cache_hit_ratio", "缓存命中率", ("cache",), lambda: _cache_stats("hit_ratio"))
+metrics.CallbackMetric("phone_lookups_coalesced_total", "被合并到进行中查询的请求数", (),
+                       lambda: {(): _flight.coalesced}, kind="counter")
+metrics.CallbackMetric("phone_upstream_circuit_open", "上游熔断器是否处于打开状态（1为打开）", (),
+                       lambda: {(): int(http_client.get_circuit_breaker().state != "closed")})
+
+
+def is_valid_number(phone_number):
+    return phone_number.isdigit() and len(phone_number) == 11
+
+
+def _request_upstream(phone_number):
+    with UPSTREAM_IN_FLIGHT.track(), UPSTREAM_LATENCY.time():
+        response = http_client.get(params={"number": phone_number}, timeout=5, retries=1)
+        return response.json()
+
+
+def _fetch(key, phone_number):
+    """
+    读取SQLite缓存，未命中再请求上游；成功结果同时写入内存缓存
+    :return: (响应内容, HTTP状态码, 查询结果分类)
+    """
+    cached = result_cache.get(phone_number)
+    if cached is not None:
+        _memory_cache.put(key, cached)
+        return {"code": 0, "data": cached}, 200, "ok"
+
+    try:
+        result = _request_upstream(phone_number)
+        if result.get("code") == 0:
+            data = result.get("data", {})
+            result_cache.put(phone_number, data)  # 仅缓存成功结果
+            _memory_cache.put(key, data)
+            return result, 200, "ok"
+        return result, 200, "failed"
+
+    except CircuitOpenError as e:
+        # 上游持续失败时熔断，直接快速返回，不再转发
+        return {"code": -3, "msg": str(e)}, 503, "circuit_open"
+
+    except requests.exceptions.RequestException as e:
+        outcome = "timeout" if isinstance(e, requests.exceptions.Timeout) else "upstream_error"
+        return {"code": -2, "msg": f"查询失败: {str(e)}"}, 500, outcome
+
+
+def lookup_number(phone_number, count=1):
+    """
+    代理查询单个号码：内存LRU缓存 → SQLite缓存 → 上游API，
+    缓存键相同（默认为同一号段）的并发请求合并为一次查询
+    :param count: 本次结果对应的号码数（批量查询中同号段的号码只查询一次，按号码数计入统计）
+    :return: (响应内容, HTTP状态码)
+    """
+    key = result_cache.get_cache().key_for(phone_number)
+    data = _memory_cache.get(key)
+    if data is not None:
+        LOOKUPS.inc("ok", amount=count)
+        return {"code": 0, "data": data}, 200
+    result, status, outcome = _flight.do(key, _fetch, key, phone_number)
+    LOOKUPS.inc(outcome, amount=count)
+    return result, status
+
+
+def record_invalid():
+    """记录一次无效号码请求（号码校验在各接口中完成）"""
+    LOOKUPS.inc("invalid")
+
+
+def stats():
+    """内存缓存命中统计与被合并的请求数"""
+    return {**_memory_cache.stats(), "coalesced": _flight.coalesced}
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    令牌桶限流：以 rate 个/秒 的速度补充令牌，最多积攒 burst 个
+    每次请求预约一个令牌并返回需要等待的时间，等待在锁外进行，多个线程可同时等待而不会被串行化
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        :param rate: 每秒允许的请求数（QPS上限）
+        :param burst: 允许的突发请求数（桶容量）
+        """
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的秒数（0表示可立即发送）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # 令牌不足：欠下的令牌按补充速度折算为等待时间
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """阻塞直到获得令牌"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """asyncio版本：挂起直到获得令牌"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+# 可重试的HTTP状态码（限流与服务端错误）
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    熔断器：最近 window 次请求中失败比例达到 failure_ratio 时打开，期间请求被拒绝（或等待恢复）；
+    经过 reset_timeout 秒后进入半开状态，只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window=20, failure_ratio=0.5, min_calls=10, reset_timeout=15):
+        """
+        :param window: 统计失败率的最近请求数
+        :param failure_ratio: 触发熔断的失败比例
+        :param min_calls: 至少统计到多少次请求才可能触发熔断
+        :param reset_timeout: 熔断后多久（秒）允许探测请求
+        """
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _wait_time(self):
+        """返回需要等待的秒数，0表示可以立即发送（调用方需持有锁）"""
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                return remaining
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return 0.2  # 等待探测请求的结果
+            self._probing = True
+        return 0.0
+
+    def before_call(self, max_wait=0):
+        """
+        请求前检查
+        :param max_wait: 熔断中最多等待恢复的秒数，0表示立即失败
+        :raises CircuitOpenError: 熔断中且等待时间超过max_wait
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                wait = self._wait_time()
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise CircuitOpenError(f"上游服务熔断中，{wait:.0f}秒后恢复")
+            time.sleep(min(wait, 1.0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                self._outcomes.clear()
+            self.state = self.CLOSED
+            self._probing = False
+            self._outcomes.append(True)
+
+    def release(self):
+        """请求未得到上游应答（如URL或参数错误）：不计入统计，只释放半开状态下的探测名额"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if self.state == self.HALF_OPEN or (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_ratio
+            ):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """指数退避+全抖动：第attempt次重试前等待 [0, min(cap, base*2^attempt)) 秒"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_retryable_error(exc):
+    """超时、连接失败和可重试状态码属于临时故障，其他错误（如4xx）重试无意义"""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRYABLE_STATUS
+    return False
@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 默认缓存文件与有效期（可通过环境变量调整）
+DEFAULT_CACHE_PATH = os.environ.get(
+    "PHONE_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".phone_area_cache.db")
+)
+# 携号转网会改变运营商，缓存默认30天后过期重新查询
+DEFAULT_TTL = float(os.environ.get("PHONE_CACHE_TTL_DAYS", "30")) * 86400
+# 设为1时按完整号码缓存（默认按号段缓存）
+DEFAULT_FULL_NUMBER = os.environ.get("PHONE_CACHE_FULL_NUMBER", "0") == "1"
+
+
+class ResultCache:
+    """
+    基于SQLite的查询结果缓存：默认按号码前7位（号段）缓存，也可按完整号码缓存
+    缓存内容与360 API的data字段一致，多线程共享同一连接，由锁保证串行访问
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, full_number=DEFAULT_FULL_NUMBER):
+        """
+        :param path: SQLite缓存文件路径
+        :param ttl: 缓存有效期（秒），<=0 表示永不过期
+        :param full_number: True按完整号码缓存，False按号段（前7位）缓存
+        """
+        self.path = path
+        self.ttl = ttl
+        self.full_number = full_number
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS phone_cache ("
+                "key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def key_for(self, phone_number):
+        """生成缓存键：号段模式取前7位，完整号码模式取整个号码"""
+        return phone_number if self.full_number else phone_number[:7]
+
+    def get(self, phone_number):
+        """读取缓存，未命中或已过期时返回None"""
+        key = self.key_for(phone_number)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM phone_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (self.ttl <= 0 or time.time() - row[1] < self.ttl):
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, phone_number, data):
+        """写入（或刷新）缓存"""
+        key = self.key_for(phone_number)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO phone_cache (key, data, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        """删除已过期的缓存记录，返回删除条数"""
+        if self.ttl <= 0:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM phone_cache WHERE updated_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        """返回命中/未命中次数及命中率"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 全局默认缓存（首次使用时按默认配置打开）
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def configure(path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, full_number=DEFAULT_FULL_NUMBER):
+    """按指定配置重新打开全局默认缓存"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is not None:
+            _default_cache.close()
+        _default_cache = ResultCache(path, ttl, full_number)
+        return _default_cache
+
+
+def get_cache():
+    """获取全局默认缓存，未配置时使用默认配置"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
+
+
+def get(phone_number):
+    """从全局默认缓存读取"""
+    return get_cache().get(phone_number)
+
+
+def put(phone_number, data):
+    """写入全局默认缓存"""
+    get_cache().put(phone_number, data)
+
+
+def stats():
+    """全局默认缓存的命中统计"""
+    return get_cache().stats()
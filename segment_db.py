@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+from array import array
+from bisect import bisect_left
+
+# 号段表中可识别的列名（英文/中文表头均可）
+FIELD_ALIASES = {
+    "prefix": ("prefix", "segment", "号段", "号码段", "前缀"),
+    "province": ("province", "省份", "省"),
+    "city": ("city", "城市", "市"),
+    "sp": ("sp", "isp", "operator", "运营商"),
+}
+
+
+def _pick(record, field):
+    """按别名从一条号段记录中取值"""
+    for alias in FIELD_ALIASES[field]:
+        value = record.get(alias)
+        if value is not None:
+            return str(value).strip()
+    return ""
+
+
+class SegmentIndex:
+    """
+    号段（手机号前7位）离线索引：
+    号段按数值排序存放在紧凑的 array 中，归属地记录去重后单独存放，查询时二分查找
+    """
+
+    def __init__(self, prefixes=None, record_ids=None, records=None):
+        self.prefixes = prefixes if prefixes is not None else array("L")
+        self.record_ids = record_ids if record_ids is not None else array("L")
+        self.records = records if records is not None else []
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        由号段记录构建索引
+        :param records: 可迭代的字典，需包含 号段/省份/城市/运营商 字段（支持英文列名）
+        :return: SegmentIndex
+        """
+        entries = {}
+        record_pos = {}
+        unique_records = []
+        for record in records:
+            prefix = _pick(record, "prefix")[:7]
+            if len(prefix) != 7 or not prefix.isdigit():
+                continue  # 跳过无效号段
+            info = (_pick(record, "province"), _pick(record, "city"), _pick(record, "sp"))
+            if info not in record_pos:
+                record_pos[info] = len(unique_records)
+                unique_records.append(info)
+            entries[int(prefix)] = record_pos[info]  # 重复号段以后出现的为准
+
+        sorted_prefixes = sorted(entries)
+        return cls(
+            array("L", sorted_prefixes),
+            array("L", (entries[p] for p in sorted_prefixes)),
+            unique_records,
+        )
+
+    def __len__(self):
+        return len(self.prefixes)
+
+    def lookup(self, phone_number):
+        """
+        查询手机号所属号段
+        :param phone_number: 清洗后的纯数字手机号（至少7位）
+        :return: 与360 API的data字段格式一致的字典，未收录时返回None
+        """
+        if len(phone_number) < 7 or not phone_number[:7].isdigit():
+            return None
+        prefix = int(phone_number[:7])
+        pos = bisect_left(self.prefixes, prefix)
+        if pos == len(self.prefixes) or self.prefixes[pos] != prefix:
+            return None
+        province, city, sp = self.records[self.record_ids[pos]]
+        return {"province": province, "city": city, "sp": sp}
+
+
+def load_segment_file(path):
+    """
+    从CSV或JSON文件加载号段表
+    CSV：首行为表头（如 号段,省份,城市,运营商）
+    JSON：记录列表，或 {"1300000": {"province": ..., "city": ..., "sp": ...}} 形式的字典
+    :param path: 号段数据文件路径
+    :return: SegmentIndex
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            records = ({"prefix": prefix, **info} for prefix, info in data.items())
+        else:
+            records = data
+        return SegmentIndex.from_records(records)
+
+    # 默认按CSV解析（兼容带BOM的UTF-8文件）
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return SegmentIndex.from_records(csv.DictReader(f))
+
+
+# 全局默认索引（未加载时为None，查询全部走API）
+_default_index = None
+
+
+def load_default_index(path):
+    """加载号段文件并设为全局默认索引，返回加载的索引"""
+    global _default_index
+    _default_index = load_segment_file(path)
+    return _default_index
+
+
+def lookup(phone_number):
+    """使用全局默认索引查询号段，未加载索引或未收录时返回None"""
+    if _default_index is None:
+        return None
+    return _default_index.lookup(phone_number)
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# 各模块位于仓库根目录，直接导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import result_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path):
+    """每个测试使用独立的空结果缓存，不读写用户目录下的缓存文件"""
+    cache = result_cache.configure(path=str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+    result_cache._default_cache = None
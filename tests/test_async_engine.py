@@ -0,0 +1,88 @@
+import functools
+import importlib
+import time
+
+import pandas as pd
+import pytest
+
+import fake_upstream
+import http_client
+import result_cache
+from rate_limit import TokenBucket
+from resilience import CircuitBreaker
+
+pytest.importorskip("aiohttp")
+import async_engine  # noqa: E402
+
+engine = importlib.import_module("号码归属地查询并发版")
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """两个引擎都请求本地模拟接口，共用新的熔断器，默认不限速、不退避"""
+    monkeypatch.setattr(http_client, "_circuit_breaker", CircuitBreaker())
+    monkeypatch.setattr(http_client, "_rate_limiter", None)
+    monkeypatch.setattr(async_engine, "backoff_delay", lambda attempt: 0.0)
+    with fake_upstream.FakeUpstream(latency=0.005) as server:
+        monkeypatch.setattr(http_client, "API_URL", server.url)
+        monkeypatch.setattr(http_client, "get", functools.partial(http_client.get, server.url))
+        yield server
+
+
+def query(numbers, concurrency=20):
+    return async_engine.query_numbers(numbers, engine.format_phone_info, concurrency)
+
+
+def test_results_match_thread_engine(upstream, tmp_path):
+    phones = pd.Series(["13800138000", "138 0013 8001", "15900159000", "17700177000", "123", None,
+                        "18600186000", "19900199000"])
+    threaded = engine.lookup_phone_column(phones, max_workers=4, engine="thread", adaptive=False)
+    calls = upstream.stats()["calls"]
+
+    cache = result_cache.configure(path=str(tmp_path / "async_cache.db"))  # 不命中上一轮写入的缓存
+    try:
+        asynchronous = engine.lookup_phone_column(phones, max_workers=4, engine="async")
+    finally:
+        cache.close()
+    pd.testing.assert_frame_equal(asynchronous, threaded)
+    assert upstream.stats()["calls"] == 2 * calls == 10
+
+
+def test_honors_shared_rate_limit(upstream, monkeypatch):
+    monkeypatch.setattr(http_client, "_rate_limiter", TokenBucket(rate=20, burst=1))
+    numbers = {i: f"13{i}00{i}3800{i}" for i in range(8)}
+    start = time.monotonic()
+    results = query(numbers)
+    assert time.monotonic() - start >= 7 / 20 * 0.9  # 8个请求，突发1个，其余每0.05秒一个
+    assert not any(location.startswith("网络错误") for location, _ in results.values())
+
+
+def test_open_circuit_rejects_without_calling_upstream(upstream, monkeypatch):
+    monkeypatch.setattr(http_client, "BATCH_CIRCUIT_WAIT", 0)
+    breaker = http_client.get_circuit_breaker()
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    results = query({"a": "13800138000", "b": "13900139000"})
+    assert all(location.startswith("网络错误") for location, _ in results.values())
+    assert upstream.stats()["calls"] == 0
+
+
+def test_failures_open_shared_circuit(upstream, monkeypatch):
+    monkeypatch.setattr(http_client, "BATCH_CIRCUIT_WAIT", 0)
+    monkeypatch.setattr(http_client, "_circuit_breaker", CircuitBreaker(min_calls=3, reset_timeout=60))
+    upstream.error_rate = 1.0
+    numbers = {i: f"13{i}00{i}3800{i}" for i in range(5)}
+    results = query(numbers, concurrency=1)
+
+    assert http_client.get_circuit_breaker().state == CircuitBreaker.OPEN
+    assert upstream.stats()["calls"] == 3  # 熔断后不再请求上游
+    assert all(location.startswith("网络错误") for location, _ in results.values())
+
+
+def test_invalid_url_does_not_reset_circuit(upstream, monkeypatch):
+    monkeypatch.setattr(http_client, "API_URL", "no-scheme.invalid/phonearea.php")
+    breaker = http_client.get_circuit_breaker()
+    breaker.record_failure()
+    location, _ = query({"a": "13800138000"})["a"]
+    assert location.startswith("网络错误")
+    assert list(breaker._outcomes) == [False]
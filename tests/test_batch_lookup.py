@@ -0,0 +1,46 @@
+import importlib
+import threading
+
+import pandas as pd
+
+engine = importlib.import_module("号码归属地查询并发版")
+
+
+def test_plan_queries_picks_one_number_per_prefix():
+    cleaned = pd.Series(["13800138000", "13800138999", "13900139000", "123", ""], index=[10, 11, 12, 13, 14])
+    prefixes, numbers = engine.plan_queries(cleaned)
+    assert prefixes.tolist()[:3] == ["1380013", "1380013", "1390013"]
+    assert prefixes[[13, 14]].isna().all()
+    assert numbers == {"1380013": "13800138000", "1390013": "13900139000"}
+
+
+def test_each_prefix_queried_once_and_joined_to_every_row(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def get_phone_info(number):
+        with lock:
+            calls.append(number)
+        return (f"地区{number[:7]}", "移动")
+
+    monkeypatch.setattr(engine, "get_phone_info", get_phone_info)
+    phones = pd.Series(["138 0013 8000", 13800138001, "13900139000", "139-0013-9999", "12345", None],
+                       index=[3, 1, 4, 0, 2, 5], dtype=object)
+    results = engine.lookup_phone_column(phones, max_workers=2, adaptive=False)
+
+    assert sorted(calls) == ["13800138000", "13900139000"]
+    assert results.index.tolist() == [3, 1, 4, 0, 2, 5]
+    assert results["归属地"].tolist() == ["地区1380013", "地区1380013", "地区1390013", "地区1390013",
+                                       "无效手机号", "无效手机号"]
+    assert results["运营商"].tolist()[:4] == ["移动"] * 4
+
+
+def test_memo_skips_known_prefixes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(engine, "get_phone_info", lambda number: calls.append(number) or ("北京", "移动"))
+    memo = {"1380013": ("上海", "联通")}
+    results = engine.lookup_phone_column(pd.Series(["13800138000", "13900139000"]), adaptive=False, memo=memo)
+
+    assert calls == ["13900139000"]
+    assert results["归属地"].tolist() == ["上海", "北京"]
+    assert memo["1390013"] == ("北京", "移动")
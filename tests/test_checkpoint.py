@@ -0,0 +1,95 @@
+import importlib
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from checkpoint import Journal, file_fingerprint
+
+engine = importlib.import_module("号码归属地查询并发版")
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "result.journal.jsonl")
+
+
+def test_fingerprint_changes_with_content(tmp_path):
+    path = tmp_path / "input.xlsx"
+    path.write_bytes(b"a")
+    first = file_fingerprint(str(path))
+    path.write_bytes(b"b")
+    assert file_fingerprint(str(path)) != first
+
+
+def test_resume_loads_completed_rows(journal_path):
+    with Journal(journal_path, "fp") as journal:
+        journal.write([(0, "13800138000", "北京", "移动"), (2, "13900139000", "上海", "联通")])
+    with Journal(journal_path, "fp") as journal:
+        assert journal.results_for([0, 1, 2]) == {0: ("北京", "移动"), 2: ("上海", "联通")}
+
+
+def test_other_input_discards_journal(journal_path):
+    with Journal(journal_path, "fp") as journal:
+        journal.write([(0, "13800138000", "北京", "移动")])
+    with Journal(journal_path, "other") as journal:
+        assert journal.completed == {}
+
+
+def test_partial_last_record_is_truncated(journal_path):
+    with Journal(journal_path, "fp") as journal:
+        journal.write([(0, "13800138000", "北京", "移动")])
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"row": 1, "number": "139')  # 中断时写了一半
+    with Journal(journal_path, "fp") as journal:
+        assert list(journal.completed) == [0]
+        journal.write([(1, "13900139000", "上海", "联通")])
+    with open(journal_path, encoding="utf-8") as f:
+        assert [json.loads(line).get("row") for line in f] == [None, 0, 1]
+
+
+def test_lookup_skips_journaled_rows(journal_path, monkeypatch):
+    queried = []
+
+    def fake_lookup(number):
+        queried.append(number)
+        return ("广东深圳", "移动")
+
+    monkeypatch.setattr(engine, "get_phone_info", fake_lookup)
+    phones = pd.Series(["13800138000", "13900139000", "abc"])
+    with Journal(journal_path, "fp") as journal:
+        journal.write([(0, "13800138000", "北京", "移动")])
+        results = engine.lookup_phone_column(phones, max_workers=2, adaptive=False, journal=journal)
+        assert sorted(journal.completed) == [0, 1, 2]
+    assert queried == ["13900139000"]
+    assert list(results["归属地"]) == ["北京", "广东深圳", "无效手机号"]
+
+
+def test_interrupt_cancels_pending_and_keeps_finished(monkeypatch):
+    started = []
+    lock = threading.Lock()
+
+    def slow_lookup(number):
+        with lock:
+            started.append(number)
+        time.sleep(0.05)
+        return ("北京", "移动")
+
+    monkeypatch.setattr(engine, "get_phone_info", slow_lookup)
+    numbers = {f"{i:07d}": f"138{i:08d}" for i in range(50)}
+    handled = []
+
+    def on_result(key, info):
+        handled.append(key)
+        if len(handled) == 1:
+            time.sleep(0.08)  # 让另一个已开始的查询先完成
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        engine.query_numbers(numbers, max_workers=2, adaptive=False, on_result=on_result)
+    time.sleep(0.1)
+    # 排队中的查询被取消，中断前已完成的结果也交给了回调
+    assert len(started) < len(numbers)
+    assert len(handled) >= 2
@@ -0,0 +1,69 @@
+import threading
+
+from concurrency import AIMDController
+
+
+def test_burst_of_failures_cuts_once_per_round():
+    controller = AIMDController(maximum=16, initial=16)
+    tickets = [controller.acquire() for _ in range(16)]
+    for ticket in tickets:
+        controller.release(0.01, False, ticket)
+    # 同一轮中已发出的请求全部失败，只削减一次
+    assert controller.limit == 8
+    assert controller.failures == 16
+
+
+def test_failure_after_full_round_cuts_again():
+    controller = AIMDController(maximum=16, initial=16)
+    first = controller.acquire()
+    controller.release(0.01, False, first)
+    assert controller.limit == 8
+
+    # 削减后开始的请求：一整轮（8个）完成前的失败不削减
+    tickets = [controller.acquire() for _ in range(8)]
+    for ticket in tickets[:7]:
+        controller.release(0.01, False, ticket)
+    assert controller.limit == 8
+    controller.release(0.01, False, tickets[7])
+    assert controller.limit == 4
+
+
+def test_limit_never_below_minimum():
+    controller = AIMDController(maximum=4, initial=4, minimum=2)
+    for _ in range(10):
+        controller.release(0.01, False, controller.acquire())
+    assert controller.limit == 2
+
+
+def test_additive_increase_when_throughput_improves():
+    controller = AIMDController(maximum=10, initial=2)
+    for _ in range(2):
+        controller.release(0.01, True, controller.acquire())
+    assert controller.limit == 3
+
+
+def test_acquire_blocks_at_limit():
+    controller = AIMDController(maximum=1, initial=1)
+    ticket = controller.acquire()
+    acquired = threading.Event()
+
+    def worker():
+        controller.release(0.0, True, controller.acquire())
+        acquired.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.1)
+    controller.release(0.0, True, ticket)
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_run_reports_result():
+    controller = AIMDController(maximum=4, initial=4)
+    assert controller.run(lambda x: x * 2, 21) == 42
+    controller.run(lambda: ("网络错误", ""), is_ok=lambda info: not info[0].startswith("网络错误"))
+    stats = controller.stats()
+    assert stats["completed"] == 2
+    assert stats["failures"] == 1
+    assert stats["in_flight"] == 0
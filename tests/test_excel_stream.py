@@ -0,0 +1,64 @@
+import importlib
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import excel_stream
+
+HEADER = ["序号", "姓名", None, "联系电话"]
+ROWS = [[1, "张三", "x", "13800138000"], [2, "李四", None, "13900139000 13700137000"]]
+
+
+def write_xlsx(path, rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    path = tmp_path / "input.xlsx"
+    write_xlsx(path, [HEADER, *ROWS])
+    return str(path)
+
+
+def test_normalize_header_names_blank_and_duplicate_columns():
+    assert excel_stream.normalize_header(["a", None, "", "a", "a"]) == ["a", "Unnamed: 1", "Unnamed: 2", "a.1", "a.2"]
+
+
+def test_read_header_matches_chunk_columns(sheet):
+    header = excel_stream.read_header(sheet)
+    chunks = list(excel_stream.iter_chunks(sheet, chunk_size=1))
+    assert header == ["序号", "姓名", "Unnamed: 2", "联系电话"]
+    assert all(list(chunk.columns) == header for chunk in chunks)
+    assert [list(chunk.index) for chunk in chunks] == [[0], [1]]
+
+
+def test_read_header_csv_blank_cell(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("序号,,联系电话\n1,x,13800138000\n", encoding="utf-8-sig")
+    header = excel_stream.read_header(str(path))
+    chunk = next(excel_stream.iter_chunks(str(path)))
+    assert header == list(chunk.columns) == ["序号", "Unnamed: 1", "联系电话"]
+
+
+def test_round_trip_with_blank_header(sheet, tmp_path):
+    output = tmp_path / "output.xlsx"
+    columns = excel_stream.read_header(sheet)
+    with excel_stream.StreamWriter(str(output), columns) as out:
+        for chunk in excel_stream.iter_chunks(sheet, chunk_size=1):
+            out.write_frame(chunk)
+    assert out.rows_written == 2
+    rows = list(load_workbook(output).active.iter_rows(values_only=True))
+    assert rows[1] == (1, "张三", "x", "13800138000")
+
+
+def test_split_rows_streaming_with_blank_header(sheet, tmp_path, monkeypatch):
+    splitter = importlib.import_module("分行")
+    monkeypatch.setattr("builtins.input", lambda prompt="": "")
+    output = tmp_path / "output.xlsx"
+    splitter.stream_process_file(sheet, str(output), chunk_size=1)
+    df = pd.read_excel(output, dtype=str)
+    assert list(df["联系电话"]) == ["13800138000", "13900139000", "13700137000"]
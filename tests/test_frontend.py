@@ -0,0 +1,25 @@
+import importlib
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+app_module = importlib.import_module("开箱即用")
+
+
+def read(name):
+    with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_pages_share_one_concurrency_script():
+    shared = read("concurrency.js")
+    standalone = read("号码归属地查询并发网页版.html")
+
+    assert '<script src="concurrency.js"></script>' in standalone
+    assert "function runPool" not in standalone
+    assert "function createConcurrencyController" not in standalone
+
+    assert "__CONCURRENCY_JS__" not in app_module.HTML_CONTENT
+    assert app_module.HTML_CONTENT.count(shared) == 1
+    assert app_module.HTML_CONTENT.count("function runPool") == 1
+    assert app_module.HTML_CONTENT.count("function createConcurrencyController") == 1
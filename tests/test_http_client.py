@@ -0,0 +1,101 @@
+import socket
+
+import pytest
+import requests
+
+import fake_upstream
+import http_client
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError
+
+
+def test_dns_cache_is_opt_in():
+    assert socket.getaddrinfo is not http_client._cached_getaddrinfo
+    http_client.enable_dns_cache()
+    try:
+        assert socket.getaddrinfo is http_client._cached_getaddrinfo
+    finally:
+        http_client.disable_dns_cache()
+    assert socket.getaddrinfo is http_client._original_getaddrinfo
+
+
+def test_dns_cache_is_bounded(monkeypatch):
+    calls = []
+
+    def fake_getaddrinfo(host, port, *args):
+        calls.append(host)
+        return [(host, port)]
+
+    monkeypatch.setattr(http_client, "_original_getaddrinfo", fake_getaddrinfo)
+    monkeypatch.setattr(http_client, "DNS_CACHE_SIZE", 3)
+    http_client.clear_dns_cache()
+    for i in range(10):
+        http_client._cached_getaddrinfo(f"host{i}", 80)
+    assert len(http_client._dns_cache) == 3
+
+    # 缓存中的条目不再解析，已淘汰的重新解析
+    http_client._cached_getaddrinfo("host9", 80)
+    http_client._cached_getaddrinfo("host0", 80)
+    assert calls.count("host9") == 1
+    assert calls.count("host0") == 2
+    http_client.clear_dns_cache()
+
+
+def test_dns_cache_expires(monkeypatch):
+    calls = []
+    monkeypatch.setattr(http_client, "_original_getaddrinfo", lambda host, port, *args: calls.append(host) or [])
+    monkeypatch.setattr(http_client, "DNS_CACHE_TTL", 0)
+    http_client.clear_dns_cache()
+    http_client._cached_getaddrinfo("example", 80)
+    http_client._cached_getaddrinfo("example", 80)
+    assert calls == ["example", "example"]
+    assert len(http_client._dns_cache) <= 1
+    http_client.clear_dns_cache()
+
+
+@pytest.fixture
+def upstream():
+    with fake_upstream.FakeUpstream(latency=0) as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def fresh_breaker(monkeypatch):
+    monkeypatch.setattr(http_client, "_circuit_breaker", CircuitBreaker())
+    monkeypatch.setattr(http_client, "_rate_limiter", None)
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt, base=0.5, cap=8.0: 0.0)
+    monkeypatch.setattr(http_client, "backoff_delay", lambda attempt, base=0.5, cap=8.0: 0.0)
+
+
+def test_get_returns_response(upstream):
+    response = http_client.get(upstream.url, params={"number": "13800138000"}, retries=0)
+    assert response.json()["code"] == 0
+    assert upstream.stats()["calls"] == 1
+
+
+def test_get_retries_transient_errors_then_raises(upstream):
+    upstream.error_rate = 1.0
+    with pytest.raises(requests.HTTPError) as exc_info:
+        http_client.get(upstream.url, params={"number": "13800138000"}, retries=2)
+    assert exc_info.value.response.status_code == 503
+    assert upstream.stats()["calls"] == 3
+
+
+def test_get_fails_fast_when_circuit_open(upstream):
+    upstream.error_rate = 1.0
+    for _ in range(http_client.get_circuit_breaker().min_calls):
+        with pytest.raises(requests.HTTPError):
+            http_client.get(upstream.url, params={"number": "13800138000"}, retries=0)
+    calls = upstream.stats()["calls"]
+    with pytest.raises(CircuitOpenError):
+        http_client.get(upstream.url, params={"number": "13800138000"}, retries=2)
+    assert upstream.stats()["calls"] == calls
+
+
+def test_client_errors_without_response_leave_breaker_alone(upstream):
+    breaker = http_client.get_circuit_breaker()
+    breaker.record_failure()
+    with pytest.raises(requests.exceptions.MissingSchema):
+        http_client.get("no-scheme.invalid/phonearea.php", retries=2)
+    assert list(breaker._outcomes) == [False]  # 未计为成功，之前的失败记录仍在
+    assert upstream.stats()["calls"] == 0
@@ -0,0 +1,114 @@
+import importlib
+import io
+import json
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+import http_client
+import jobs
+
+engine = importlib.import_module("号码归属地查询并发版")
+
+
+@pytest.fixture
+def fake_lookup(monkeypatch, tmp_path):
+    """后台任务不访问网络：按号段返回固定结果，任务文件写入临时目录"""
+    calls = []
+
+    def get_phone_info(number):
+        calls.append(number)
+        return ("北京北京", "移动")
+
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(engine, "get_phone_info", get_phone_info)
+    return calls
+
+
+def make_job(tmp_path, rows):
+    df = pd.DataFrame(rows, columns=["姓名", "联系电话", "归属地", "运营商"])
+    job = jobs.Job("名单.xlsx", max_workers=4)
+    df.to_excel(job.input_path, index=False)
+    return job
+
+
+def test_job_runs_without_stderr(fake_lookup, tmp_path, monkeypatch):
+    # 打包的窗口程序没有stderr，后台任务不能依赖tqdm进度条
+    monkeypatch.setattr(sys, "stderr", None)
+    job = make_job(tmp_path, [["张三", "13800138000", None, None], ["李四", "13800138001", None, None],
+                              ["王五", "123", None, None]])
+    job.run()
+    monkeypatch.undo()
+
+    assert job.state == jobs.Job.DONE, job.message
+    assert job.snapshot()["completed"] == job.total == 3
+    assert job.errors == 1
+    assert fake_lookup == ["13800138000"]  # 同一号段只查询一次
+    result = pd.read_excel(job.output_path, dtype=str)
+    assert list(result["归属地"]) == ["北京北京", "北京北京", "无效手机号"]
+
+
+def test_job_splits_double_numbers(fake_lookup, tmp_path):
+    job = make_job(tmp_path, [["张三", "1380013800013900139000", None, None]])
+    job.run()
+
+    assert job.state == jobs.Job.DONE, job.message
+    result = pd.read_excel(job.output_path, dtype=str)
+    assert list(result["联系电话"]) == ["13800138000", "13900139000"]
+
+
+def test_job_keeps_shared_connection_pool(fake_lookup, tmp_path, monkeypatch):
+    # 后台任务沿用服务已配置好的连接池，不能按任务并发数重新配置
+    configured = []
+    monkeypatch.setattr(http_client, "configure", lambda **kwargs: configured.append(kwargs))
+    job = make_job(tmp_path, [["张三", "13800138000", None, None]])
+    job.run()
+
+    assert job.state == jobs.Job.DONE, job.message
+    assert configured == []
+
+
+def test_upload_rejects_xls():
+    app_module = importlib.import_module("开箱即用")
+    client = app_module.app.test_client()
+    response = client.post("/jobs", data={"file": (io.BytesIO(b"xls"), "名单.xls")},
+                           content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert ".xlsx" in response.get_json()["msg"]
+
+
+def test_waiters_wake_on_progress_and_finish(fake_lookup, tmp_path):
+    job = make_job(tmp_path, [["张三", "13800138000", None, None]])
+    version = job.wait_for_change(None, timeout=0)
+    assert job.wait_for_change(version, timeout=0.01) == version  # 无变化时超时返回
+    assert not job.wait_finished(timeout=0.01)
+
+    worker = threading.Thread(target=job.run)
+    worker.start()
+    assert job.wait_for_change(version, timeout=10) != version
+    assert job.wait_finished(timeout=10)
+    worker.join()
+    assert job.state == jobs.Job.DONE, job.message
+
+
+def test_event_streams_are_capped_and_end_with_final_state(fake_lookup, tmp_path, monkeypatch):
+    app_module = importlib.import_module("开箱即用")
+    client = app_module.app.test_client()
+    job = make_job(tmp_path, [["张三", "13800138000", None, None]])
+    monkeypatch.setitem(jobs._jobs, job.id, job)
+    url = f"/jobs/{job.id}/events"
+
+    streams = [client.get(url) for _ in range(app_module.MAX_EVENT_STREAMS)]
+    assert [response.status_code for response in streams] == [200] * app_module.MAX_EVENT_STREAMS
+    assert client.get(url).status_code == 503  # 推送连接已满，页面改为定时查询
+    for response in streams:
+        response.close()
+
+    threading.Thread(target=job.run, daemon=True).start()
+    response = client.get(url)
+    events = [json.loads(line[len("data: "):]) for line in response.get_data(as_text=True).split("\n\n") if line]
+    response.close()
+    assert events[-1]["state"] == jobs.Job.DONE
+    assert events[-1]["completed"] == 1
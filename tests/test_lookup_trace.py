@@ -0,0 +1,114 @@
+import functools
+import json
+import socket
+import time
+
+import pytest
+import urllib3.util.connection
+
+import fake_upstream
+import http_client
+import lookup_trace
+import number
+from resilience import CircuitBreaker
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """get_phone_info 改为请求本地模拟接口"""
+    monkeypatch.setattr(http_client, "_circuit_breaker", CircuitBreaker())
+    monkeypatch.setattr(http_client, "_rate_limiter", None)
+    with fake_upstream.FakeUpstream(latency=0.01) as server:
+        monkeypatch.setattr(http_client, "get", functools.partial(http_client.get, server.url))
+        yield server
+
+
+@pytest.fixture
+def trace_path(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    lookup_trace.enable(path)
+    yield path
+    lookup_trace.disable()
+
+
+def test_disabled_by_default(upstream):
+    assert not lookup_trace.enabled()
+    assert number.get_phone_info("13800138000")[1] in fake_upstream.OPERATORS.values()
+    assert getattr(lookup_trace._local, "record", None) is None
+
+
+def test_records_api_and_local_lookups(upstream, trace_path):
+    number.get_phone_info("13800138000")
+    number.get_phone_info("13800138001")  # 同一号段，命中缓存
+    number.get_phone_info("123")
+    lookup_trace.disable()
+
+    api, cached, invalid = lookup_trace.load(trace_path)
+    assert (api["outcome"], api["source"]) == ("ok", "api")
+    assert len(api["attempts"]) == 1 and api["attempts"][0]["status"] == 200
+    assert set(api["attempts"][0]) >= {f"{name}_ms" for name in lookup_trace.PHASES}
+    assert api["attempts"][0]["server_ms"] >= 5  # 模拟接口延迟10毫秒
+    assert "parse_ms" in api
+    assert (cached["outcome"], cached["source"], cached["attempts"]) == ("ok", "local", [])
+    assert (invalid["outcome"], invalid["number"]) == ("invalid", "123")
+
+
+def test_dns_time_recorded_without_dns_cache(trace_path, monkeypatch):
+    resolve = socket.getaddrinfo
+
+    def slow_getaddrinfo(host, *args, **kwargs):
+        if host == "localhost":
+            time.sleep(0.03)  # 只有域名需要DNS解析，IP地址直接返回
+        return resolve(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", slow_getaddrinfo)
+    monkeypatch.setattr(http_client, "_circuit_breaker", CircuitBreaker())
+    monkeypatch.setattr(http_client, "_rate_limiter", None)
+    with fake_upstream.FakeUpstream(latency=0) as server:
+        url = server.url.replace("127.0.0.1", "localhost")  # 需要解析域名的新连接
+        monkeypatch.setattr(http_client, "get", functools.partial(http_client.get, url))
+        assert not number.get_phone_info("13800138000")[0].startswith("网络错误")
+    lookup_trace.disable()
+
+    attempt, = lookup_trace.load(trace_path)[0]["attempts"]
+    assert attempt["dns_ms"] >= 25
+    assert attempt["connect_ms"] < 25  # 解析耗时不再计入建连
+
+
+def test_failed_attempts_recorded(upstream, trace_path, monkeypatch):
+    monkeypatch.setattr(http_client, "backoff_delay", lambda attempt, base=0.5, cap=8.0: 0.0)
+    upstream.error_rate = 1.0
+    location, _ = number.get_phone_info("13800138000")
+    lookup_trace.disable()
+
+    assert location.startswith("网络错误")
+    record, = lookup_trace.load(trace_path)
+    assert record["outcome"] == "network_error"
+    assert [attempt["status"] for attempt in record["attempts"]] == [503] * (http_client.DEFAULT_RETRIES + 1)
+
+
+def test_disable_restores_urllib3(tmp_path):
+    original = urllib3.util.connection.create_connection
+    lookup_trace.enable(str(tmp_path / "trace.jsonl"))
+    assert urllib3.util.connection.create_connection is not original
+    lookup_trace.disable()
+    assert urllib3.util.connection.create_connection is original
+    assert not lookup_trace.enabled()
+
+
+def test_summarize(upstream, trace_path, capsys):
+    for phone in ("13800138000", "13900139000", "123"):
+        number.get_phone_info(phone)
+    lookup_trace.disable()
+
+    lookup_trace.summarize(lookup_trace.load(trace_path), top=2)
+    out = capsys.readouterr().out
+    assert "共 3 次查询" in out
+    assert "API查询 2 次，请求 2 次" in out
+    assert "最慢的 2 个号码" in out
+
+
+def test_trace_file_is_jsonl(upstream, trace_path):
+    number.get_phone_info("13800138000")
+    with open(trace_path, encoding="utf-8") as f:
+        assert json.loads(f.readline())["number"] == "13800138000"
@@ -0,0 +1,94 @@
+import importlib
+import json
+
+import pytest
+
+import metrics
+import proxy_lookup
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """测试中创建的指标注册到独立的列表，不混入服务的 /metrics 输出"""
+    monkeypatch.setattr(metrics, "_registry", [])
+    return metrics
+
+
+def test_counter_and_gauge_render(registry):
+    counter = registry.Counter("demo_total", "示例计数", ("outcome",))
+    gauge = registry.Gauge("demo_in_flight", "示例当前值")
+    counter.inc("ok")
+    counter.inc("ok", amount=2)
+    counter.inc('say "hi"\n')
+    with gauge.track():
+        assert "demo_in_flight 1" in registry.render()
+
+    text = registry.render()
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{outcome="ok"} 3' in text
+    assert 'demo_total{outcome="say \\"hi\\"\\n"} 1' in text
+    assert "demo_in_flight 0" in text
+    assert text.endswith("\n")
+
+
+def test_counter_requires_labels(registry):
+    counter = registry.Counter("demo_total", "示例计数", ("outcome",))
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = registry.Histogram("demo_seconds", "示例耗时", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'demo_seconds_bucket{le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{le="+Inf"} 4' in lines
+    assert "demo_seconds_sum 3.65" in lines
+    assert "demo_seconds_count 4" in lines
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    """代理服务的测试客户端，上游查询替换为固定结果"""
+    app_module = importlib.import_module("开箱即用")
+    upstream_calls = []
+
+    def fake_fetch(key, number):
+        upstream_calls.append(number)
+        return {"code": 0, "data": {"province": "北京", "city": "北京", "sp": "移动"}}, 200, "ok"
+
+    monkeypatch.setattr(proxy_lookup, "_memory_cache", proxy_lookup.LRUCache())
+    monkeypatch.setattr(proxy_lookup, "_fetch", fake_fetch)
+    client = app_module.app.test_client()
+    client.upstream_calls = upstream_calls
+    return client
+
+
+def lookups(outcome):
+    return proxy_lookup.LOOKUPS._values.get((outcome,), 0)
+
+
+def test_batch_counts_every_number(app_client):
+    ok_before, invalid_before = lookups("ok"), lookups("invalid")
+    numbers = ["13800138000", "13800138001", "13800138002", "13900139000", "123"]
+    response = app_client.post("/query/batch", json={"numbers": numbers})
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert sorted(row["number"] for row in rows) == sorted(numbers)
+    assert len(app_client.upstream_calls) == 2  # 每个号段只查询一次
+    assert lookups("ok") - ok_before == 4  # 但按号码数计入统计
+    assert lookups("invalid") - invalid_before == 1
+
+
+def test_metrics_endpoint(app_client):
+    app_client.get("/query", query_string={"number": "13800138000"})
+    response = app_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type == metrics.CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    assert "# TYPE phone_lookups_total counter" in text
+    assert 'phone_http_responses_total{endpoint="/query",status="200"}' in text
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from phone_column import clean_phone_column
+
+
+def test_float_column_with_blanks():
+    phones = pd.Series([13800138000.0, np.nan, 13900139000.0])
+    assert clean_phone_column(phones).tolist() == ["13800138000", "", "13900139000"]
+
+
+def test_large_floats_are_not_written_in_scientific_notation():
+    phones = pd.Series([1.38e10, 1.3800138e10])
+    assert clean_phone_column(phones).tolist() == ["13800000000", "13800138000"]
+
+
+def test_int_column():
+    phones = pd.Series([13800138000, 13900139000], dtype="int64")
+    assert clean_phone_column(phones).tolist() == ["13800138000", "13900139000"]
+
+
+@pytest.mark.parametrize("raw, cleaned", [
+    ("138-0013-8000", "13800138000"),
+    (" (138) 0013 8000 ", "13800138000"),
+    ("+86 138 0013 8000", "8613800138000"),
+    ("电话：13800138000\n", "13800138000"),
+    ("", ""),
+])
+def test_stray_characters_removed(raw, cleaned):
+    assert clean_phone_column(pd.Series([raw]))[0] == cleaned
+
+
+def test_mixed_object_column():
+    # 文本与数字混合的列（部分单元格为数字、部分为文本、部分为空）
+    phones = pd.Series([13800138000.0, "139 0013 9000", None, np.nan, 13700137000], dtype=object)
+    assert clean_phone_column(phones).tolist() == ["13800138000", "13900139000", "", "", "13700137000"]
+
+
+def test_keeps_index_and_object_dtype():
+    phones = pd.Series(["13800138000", None], index=[5, 9])
+    cleaned = clean_phone_column(phones)
+    assert cleaned.index.tolist() == [5, 9]
+    assert cleaned.dtype == object
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+import proxy_lookup
+from proxy_lookup import LRUCache, SingleFlight
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["size"] == 2
+
+
+def test_lru_entries_expire(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=10, ttl=5)
+    cache.put("a", 1)
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.1
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow(value):
+        calls.append(value)
+        release.wait(1)
+        return value * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow, 21))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [21]
+    assert results == [42] * 5
+    assert flight.coalesced == 4
+
+
+def test_single_flight_shares_errors_and_forgets_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_lookup_number_hits_memory_cache(monkeypatch):
+    monkeypatch.setattr(proxy_lookup, "_memory_cache", LRUCache())
+    upstream_calls = []
+
+    def fake_fetch(key, number):
+        upstream_calls.append(number)
+        proxy_lookup._memory_cache.put(key, {"province": "北京", "city": "北京", "sp": "移动"})
+        return {"code": 0, "data": {}}, 200, "ok"
+
+    monkeypatch.setattr(proxy_lookup, "_fetch", fake_fetch)
+    proxy_lookup.lookup_number("13800138000")
+    result, status = proxy_lookup.lookup_number("13800138001")  # 同一号段
+    assert status == 200 and result["data"]["sp"] == "移动"
+    assert upstream_calls == ["13800138000"]
@@ -0,0 +1,77 @@
+import importlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import proxy_lookup
+
+app_module = importlib.import_module("开箱即用")
+
+
+@pytest.fixture
+def lookup_calls(monkeypatch):
+    """批量接口的每次查询替换为固定结果，记录查询的号码、号码数和同时进行的查询数"""
+    lookups = SimpleNamespace(calls=[], active=0, peak=0)
+    lock = threading.Lock()
+
+    def fake_lookup(number, count=1):
+        with lock:
+            lookups.calls.append((number, count))
+            lookups.active += 1
+            lookups.peak = max(lookups.peak, lookups.active)
+        time.sleep(0.02)
+        with lock:
+            lookups.active -= 1
+        return {"code": 0, "data": {"prefix": number[:7]}}, 200
+
+    monkeypatch.setattr(proxy_lookup, "lookup_number", fake_lookup)
+    return lookups
+
+
+def post_batch(payload):
+    response = app_module.app.test_client().post("/query/batch", json=payload)
+    return response, [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_invalid_numbers_first_then_prefix_groups_in_input_order(lookup_calls):
+    numbers = ["13800138000", "123", "13900139000", "13800138001", "abcdefghijk", "13800138002", 13900139001]
+    response, rows = post_batch({"numbers": numbers})
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [row["number"] for row in rows[:2]] == ["123", "abcdefghijk"]
+    assert all(row["code"] == -1 and row["msg"] == "无效的手机号" for row in rows[:2])
+
+    # 同号段的号码只查询一次，结果按输入顺序连续返回
+    valid = [row["number"] for row in rows[2:]]
+    groups = [valid[:3], valid[3:]] if valid[0].startswith("1380013") else [valid[2:], valid[:2]]
+    assert groups == [["13800138000", "13800138001", "13800138002"], ["13900139000", "13900139001"]]
+    assert sorted(lookup_calls.calls) == [("13800138000", 3), ("13900139000", 2)]
+    assert all(row["code"] == 0 and row["data"]["prefix"] == row["number"][:7] for row in rows[2:])
+
+
+@pytest.mark.parametrize("concurrency, expected_peak", [(2, 2), (1000, app_module.BATCH_WORKERS), (None, 15)])
+def test_concurrency_caps_simultaneous_lookups(lookup_calls, concurrency, expected_peak):
+    numbers = [f"1{i:03d}0000000" for i in range(100, 160)]  # 60个不同号段
+    payload = {"numbers": numbers} if concurrency is None else {"numbers": numbers, "concurrency": concurrency}
+    _, rows = post_batch(payload)
+
+    assert sorted(row["number"] for row in rows) == numbers
+    assert len(lookup_calls.calls) == 60
+    assert 2 <= lookup_calls.peak <= expected_peak
+
+
+@pytest.mark.parametrize("payload", [
+    {"numbers": "13800138000"},
+    {"numbers": None},
+    {},
+    {"numbers": ["13800138000"] * (app_module.MAX_BATCH_SIZE + 1)},
+])
+def test_rejects_bad_number_lists(lookup_calls, payload):
+    response, _ = post_batch(payload)
+    assert response.status_code == 400
+    assert response.get_json()["code"] == -1
+    assert lookup_calls.calls == []
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rate_limit import TokenBucket
+
+
+def test_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_burst_is_available_immediately():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_reservations_are_spaced_by_rate():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.reserve() == 0.0
+    delays = [bucket.reserve() for _ in range(3)]
+    # 欠下的令牌依次折算为0.1、0.2、0.3秒的等待
+    assert delays == pytest.approx([0.1, 0.2, 0.3], abs=0.01)
+
+
+def test_tokens_refill_up_to_burst(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.reserve()
+    bucket.reserve()
+    now[0] += 10  # 长时间空闲也最多积攒 burst 个令牌
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_threads_share_the_rate():
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 11个请求：第一个立即发送，其余按每秒50个间隔
+    assert time.monotonic() - start >= 0.18
+
+
+def test_acquire_async_waits():
+    bucket = TokenBucket(rate=20, burst=1)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire_async()
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) >= 0.09
@@ -0,0 +1,115 @@
+import time
+
+import pytest
+import requests
+
+from resilience import CircuitBreaker, CircuitOpenError, backoff_delay, is_retryable_error
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = CircuitBreaker(min_calls=5)
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_opens_at_failure_ratio(clock):
+    breaker = CircuitBreaker(window=10, failure_ratio=0.5, min_calls=4)
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=15)
+    open_breaker(breaker)
+    clock[0] += 15
+    breaker.before_call()  # 探测请求
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # 探测结果出来前其余请求被拒绝
+
+
+def test_probe_success_closes(clock):
+    breaker = CircuitBreaker(min_calls=3, reset_timeout=15)
+    open_breaker(breaker)
+    clock[0] += 15
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+    # 关闭后重新统计，单次失败不会再次打开
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=15)
+    open_breaker(breaker)
+    clock[0] += 15
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 14
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_release_frees_probe_without_closing(clock):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=15)
+    open_breaker(breaker)
+    clock[0] += 15
+    breaker.before_call()
+    breaker.release()  # 探测请求未得到上游应答
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()  # 可以发出下一个探测请求
+
+
+def test_before_call_waits_for_recovery(monkeypatch):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=0.2)
+    open_breaker(breaker)
+    start = time.monotonic()
+    breaker.before_call(max_wait=1)
+    assert time.monotonic() - start >= 0.15
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize("exc, retryable", [
+    (requests.exceptions.ConnectTimeout(), True),
+    (requests.exceptions.ConnectionError(), True),
+    (http_error(429), True),
+    (http_error(503), True),
+    (http_error(404), False),
+    (CircuitOpenError(), False),
+    (ValueError(), False),
+])
+def test_is_retryable_error(exc, retryable):
+    assert is_retryable_error(exc) is retryable
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, base=0.5, cap=2.0) < 2.0 for attempt in range(10))
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache
+
+DATA = {"province": "北京", "city": "北京", "sp": "移动"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"), ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_segment_mode_shares_entries(cache):
+    assert cache.get("13800138000") is None
+    cache.put("13800138000", DATA)
+    assert cache.get("13800138999") == DATA
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_full_number_mode(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"), full_number=True)
+    cache.put("13800138000", DATA)
+    assert cache.get("13800138000") == DATA
+    assert cache.get("13800138001") is None
+    cache.close()
+
+
+def test_entries_expire_and_purge(cache, monkeypatch):
+    cache.put("13800138000", DATA)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("13800138000") is None
+    assert cache.purge_expired() == 1
+
+
+def test_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResultCache(path)
+    first.put("13800138000", DATA)
+    first.close()
+    second = ResultCache(path)
+    assert second.get("13800138000") == DATA
+    second.close()
+
+
+def test_module_level_cache_uses_configured_path(isolated_cache):
+    result_cache.put("13800138000", DATA)
+    assert result_cache.get_cache() is isolated_cache
+    assert isolated_cache.get("13800138000") == DATA
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import segment_db
+from segment_db import SegmentIndex
+
+
+def test_lookup_by_prefix_with_chinese_headers():
+    index = SegmentIndex.from_records([
+        {"号段": "1380013", "省份": "北京", "城市": "北京", "运营商": "移动"},
+        {"号段": "1300000", "省份": "山东", "城市": "济南", "运营商": "联通"},
+    ])
+    assert len(index) == 2
+    assert index.lookup("13800138000") == {"province": "北京", "city": "北京", "sp": "移动"}
+    assert index.lookup("13000001234")["city"] == "济南"
+    assert index.lookup("13900139000") is None
+    assert index.lookup("138") is None
+
+
+def test_invalid_prefixes_skipped_and_last_duplicate_wins():
+    index = SegmentIndex.from_records([
+        {"prefix": "13800", "province": "x"},
+        {"prefix": "abcdefg", "province": "x"},
+        {"prefix": "1380013", "province": "北京", "city": "北京", "sp": "移动"},
+        {"prefix": "1380013", "province": "天津", "city": "天津", "sp": "移动"},
+    ])
+    assert len(index) == 1
+    assert index.lookup("13800138000")["province"] == "天津"
+
+
+def test_identical_records_stored_once():
+    records = [{"prefix": str(1380000 + i), "province": "北京", "city": "北京", "sp": "移动"} for i in range(100)]
+    index = SegmentIndex.from_records(records)
+    assert len(index) == 100
+    assert len(index.records) == 1
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".json"])
+def test_load_segment_file(tmp_path, suffix):
+    path = tmp_path / f"segments{suffix}"
+    if suffix == ".csv":
+        path.write_text("\ufeff号段,省份,城市,运营商\n1380013,北京,北京,移动\n", encoding="utf-8")
+    else:
+        path.write_text(json.dumps({"1380013": {"province": "北京", "city": "北京", "sp": "移动"}}), encoding="utf-8")
+    index = segment_db.load_segment_file(str(path))
+    assert index.lookup("13800138000") == {"province": "北京", "city": "北京", "sp": "移动"}
+
+
+def test_default_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(segment_db, "_default_index", None)
+    assert segment_db.lookup("13800138000") is None
+    path = tmp_path / "segments.csv"
+    path.write_text("prefix,province,city,sp\n1380013,北京,北京,移动\n", encoding="utf-8")
+    segment_db.load_default_index(str(path))
+    assert segment_db.lookup("13800138000")["sp"] == "移动"
@@ -0,0 +1,77 @@
+import importlib
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+split_rows = importlib.import_module("分行")
+
+
+def old_process_phone_numbers(df, phone_column):
+    """改写前的逐行实现（每个单元格最多拆分前两个号码），作为对照"""
+    rows = []
+    for _, row in df.iterrows():
+        phones = re.findall(r'1\d{10}', str(row[phone_column]))
+        if len(phones) < 2:
+            rows.append(row)
+            continue
+        name = "" if pd.isna(row.get('姓名')) else str(row.get('姓名'))
+        parts = name.split('\n')
+        if not name:
+            names = [name]
+        elif '\n' in name and len(parts) == 2:
+            names = [parts[0] + '\n', parts[1]]
+        else:
+            mid = len(name) // 2
+            names = [name[:mid] + '\n', name[mid:]]
+        for i, phone in enumerate(phones[:2]):
+            new_row = row.copy()
+            new_row[phone_column] = phone
+            new_row['姓名'] = names[i] if i < len(names) else name
+            rows.append(new_row)
+    return pd.DataFrame(rows)
+
+
+def test_matches_old_row_by_row_output():
+    df = pd.DataFrame({
+        "序号": [1, 2, 3, 4, 5, 6, 7],
+        "姓名": ["张三李四", "王五\n赵六", "孙七", None, "周八吴九郑十", "钱一\n孙二\n李三", "陈"],
+        "联系电话": ["13800138000 13900139000", "13700137000/13600136000", "13500135000", "13400134000,13300133000",
+                 "13200132000、13100131000", "1380013800113900139001", "无"],
+    })
+    expected = old_process_phone_numbers(df, "联系电话")
+    result = split_rows.process_phone_numbers(df, "联系电话")
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_three_numbers_per_cell():
+    df = pd.DataFrame({"姓名": ["甲乙丙", "张三\n李四\n王五"],
+                       "联系电话": ["13800138000 13900139000 13700137000", "138001380001390013900013700137000"]})
+    result = split_rows.process_phone_numbers(df, "联系电话")
+    assert result["联系电话"].tolist() == ["13800138000", "13900139000", "13700137000"] * 2
+    assert result["姓名"].tolist() == ["甲\n", "乙\n", "丙", "张三\n", "李四\n", "王五"]
+    assert result.index.tolist() == [0, 0, 0, 1, 1, 1]
+
+
+def test_newline_names_with_mismatched_count_split_evenly():
+    df = pd.DataFrame({"姓名": ["张三\n李四\n王五"], "联系电话": ["13800138000 13900139000"]})
+    result = split_rows.process_phone_numbers(df, "联系电话")
+    assert result["姓名"].tolist() == ["张三\n李\n", "四\n王五"]
+
+
+@pytest.mark.parametrize("length", [split_rows.MAX_MATRIX_WIDTH, split_rows.MAX_MATRIX_WIDTH + 1, 5000])
+def test_long_names_split_like_short_ones(length):
+    name = "".join(chr(0x4e00 + i % 500) for i in range(length))
+    names = pd.Series([name, name, name, "ab", "ab"])
+    counts = np.array([3, 3, 3, 2, 2])
+    positions = np.array([0, 1, 2, 0, 1])
+    parts = split_rows.split_names(names, counts, positions).tolist()
+    third = length // 3
+    assert parts[:3] == [name[:third] + "\n", name[third:length * 2 // 3] + "\n", name[length * 2 // 3:]]
+    assert parts[3:] == ["a\n", "b"]
+
+
+def test_rows_without_multiple_numbers_untouched():
+    df = pd.DataFrame({"姓名": ["张三"], "联系电话": ["13800138000"]})
+    assert split_rows.process_phone_numbers(df, "联系电话") is df
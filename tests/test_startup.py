@@ -0,0 +1,49 @@
+import importlib
+import os
+import socket
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+app_module = importlib.import_module("开箱即用")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def test_import_does_not_load_jobs_or_pandas(tmp_path):
+    # 在新进程中导入，避免受其他测试已导入模块的影响
+    code = ("import importlib, sys; importlib.import_module('开箱即用'); "
+            "print(sorted(name for name in ('jobs', 'pandas', 'openpyxl') if name in sys.modules))")
+    env = {**os.environ, "PHONE_CACHE_PATH": str(tmp_path / "cache.db")}
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_wait_until_ready_times_out_on_closed_port():
+    assert not app_module.wait_until_ready(free_port(), timeout=0.1)
+
+
+def test_app_answers_once_ready():
+    pytest.importorskip("waitress")
+    port = free_port()
+    # 与 main() 相同，在后台线程中启动服务（一直阻塞，服务线程随测试进程结束）
+    threading.Thread(target=app_module.run_server, args=(port,), daemon=True).start()
+    assert app_module.wait_until_ready(port)
+
+    # 无效号码直接返回400，不请求上游
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"http://localhost:{port}/query?number=123", timeout=5)
+    assert error.value.code == 400
+    with urllib.request.urlopen(f"http://localhost:{port}/", timeout=5) as response:
+        assert f"http://localhost:{port}/query".encode() in response.read()
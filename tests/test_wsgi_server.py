@@ -0,0 +1,54 @@
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+
+import wsgi_server
+
+pytest.importorskip("waitress")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.02)
+    raise TimeoutError(f"端口 {port} 未就绪")
+
+
+def test_serves_slow_requests_concurrently():
+    app = Flask(__name__)
+
+    @app.route("/slow")
+    def slow():
+        time.sleep(0.3)
+        return "ok"
+
+    port = free_port()
+    # waitress.serve 会一直阻塞，服务线程随测试进程结束
+    threading.Thread(target=wsgi_server.serve, args=(app, "localhost", port), kwargs={"threads": 8},
+                     daemon=True).start()
+    wait_for_port(port)
+
+    def get(_):
+        with urllib.request.urlopen(f"http://localhost:{port}/slow", timeout=5) as response:
+            return response.read()
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        bodies = list(pool.map(get, range(8)))
+    assert bodies == [b"ok"] * 8
+    assert time.monotonic() - start < 0.3 * 4  # 8个请求同时处理，而不是逐个排队
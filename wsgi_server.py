@@ -0,0 +1,32 @@
+import os
+
+# 生产WSGI服务（waitress）参数，可通过环境变量调整
+# 工作线程数需覆盖前端最大并发数（30）以及进度推送等长连接
+DEFAULT_THREADS = int(os.environ.get("PHONE_SERVER_THREADS", "40"))
+DEFAULT_BACKLOG = int(os.environ.get("PHONE_SERVER_BACKLOG", "1024"))
+DEFAULT_CONNECTION_LIMIT = int(os.environ.get("PHONE_SERVER_CONNECTIONS", "200"))
+DEFAULT_KEEPALIVE = int(os.environ.get("PHONE_SERVER_KEEPALIVE", "120"))
+
+try:
+    import waitress
+except ImportError:  # 未安装waitress时退回Flask自带的开发服务器
+    waitress = None
+
+
+def serve(app, host, port, threads=DEFAULT_THREADS, backlog=DEFAULT_BACKLOG,
+          connection_limit=DEFAULT_CONNECTION_LIMIT, keepalive=DEFAULT_KEEPALIVE):
+    """
+    启动WSGI服务（阻塞直到服务停止）：优先使用waitress多线程服务器，未安装时使用Flask开发服务器
+    :param app: Flask应用
+    :param threads: 处理请求的工作线程数
+    :param backlog: 监听队列长度（尚未accept的连接数上限）
+    :param connection_limit: 同时保持的最大连接数，超出的连接在监听队列中等待
+    :param keepalive: 长连接空闲超过该秒数后关闭
+    """
+    if waitress is None:
+        print("未安装waitress，使用Flask开发服务器（pip install waitress 可提升并发性能）")
+        app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
+        return
+
+    waitress.serve(app, host=host, port=port, threads=threads, backlog=backlog,
+                   connection_limit=connection_limit, channel_timeout=keepalive)
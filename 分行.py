@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
-import re
 import os
+import excel_stream
+
+# 平均切分姓名时，不超过该长度的姓名在字符码矩阵上批量切片（矩阵大小为 行数×最长姓名长度），
+# 更长的文本（如备注类长文本）逐行切片，避免一个超长单元格使整个矩阵占用大量内存
+MAX_MATRIX_WIDTH = 64
 
 
 def find_phone_column(df):
@@ -26,69 +31,100 @@ def select_phone_column(df):
             print("请输入有效的数字")
 
 
-def split_name(name, num_parts):
-    """根据需要拆分姓名，适用于有多个姓名的情况"""
-    # 确保name是字符串类型
-    if pd.isna(name):
-        name = ""
-    else:
-        name = str(name)
-
-    if num_parts == 1 or not name:
-        return [name]
-
-    # 处理包含换行符的姓名
-    if '\n' in name:
-        parts = name.split('\n')
-        # 确保拆分后的部分数量与电话号码数量一致
-        if len(parts) == num_parts:
-            return [f"{part}\n" if i < len(parts) - 1 else part for i, part in enumerate(parts)]
-        else:
-            # 如果拆分数量不匹配，尝试平均分配
-            mid = len(name) // num_parts
-            return [name[:mid] + '\n', name[mid:]]
-    else:
-        # 如果没有换行符，平均拆分
-        mid = len(name) // num_parts
-        return [name[:mid] + '\n', name[mid:]]
+def _slice_chars(names, start, end):
+    """在字符码矩阵上一次取出所有行的切片 names[i][start[i]:end[i]]"""
+    chars = names.to_numpy(dtype=str)
+    width = chars.dtype.itemsize // 4
+    codes = chars.view(np.uint32).reshape(len(chars), width)
+    index = start[:, None] + np.arange(width)
+    sliced = np.take_along_axis(codes, np.minimum(index, width - 1), axis=1)
+    sliced[index >= end[:, None]] = 0  # 结尾补0，转回字符串时自动去除
+    return sliced.view(f"<U{width}").ravel().astype(object)
+
+
+def split_names(names, counts, positions):
+    """
+    向量化拆分姓名，适用于一个单元格有多个姓名的情况
+    姓名按换行符分段且段数与号码数一致时逐段对应，否则按字符数平均切分；除最后一段外末尾保留换行符
+    :param names: 已按号码展开的姓名列
+    :param counts: 每行所在单元格的号码总数（numpy数组）
+    :param positions: 每行是该单元格中的第几个号码（从0开始，numpy数组）
+    :return: 拆分后的姓名列
+    """
+    names = names.fillna("").astype(str)
+    lengths = names.str.len().to_numpy()
+    parts = np.empty(len(names), dtype=object)
+
+    # 按换行符分段且段数一致时取对应的段
+    by_line = (names.str.count("\n") + 1).to_numpy() == counts
+    if by_line.any():
+        lines = names[by_line].str.split("\n")
+        parts[by_line] = [segments[i] for segments, i in zip(lines, positions[by_line])]
+
+    # 其余平均切分：第i段为 [len*i//n, len*(i+1)//n)
+    start = lengths * positions // counts
+    end = lengths * (positions + 1) // counts
+    short = ~by_line & (lengths <= MAX_MATRIX_WIDTH)
+    if short.any():
+        parts[short] = _slice_chars(names[short], start[short], end[short])
+    long = ~by_line & ~short
+    if long.any():
+        parts[long] = [name[s:e] for name, s, e in zip(names[long], start[long], end[long])]
+
+    parts = np.where(positions < counts - 1, parts + "\n", parts)
+    return pd.Series(np.where(lengths > 0, parts, ""), index=names.index)
 
 
 def process_phone_numbers(df, phone_column):
-    """处理电话号码，将过长的号码拆分为多行"""
-    processed_rows = []
-
-    # 正则表达式匹配11位手机号码
-    phone_pattern = re.compile(r'1\d{10}')
-
-    for _, row in df.iterrows():
-        phone_data = str(row[phone_column])
-
-        # 提取所有11位电话号码
-        phones = phone_pattern.findall(phone_data)
-
-        if len(phones) == 1:
-            # 只有一个电话号码，直接保留
-            processed_rows.append(row)
-        elif len(phones) >= 2:
-            # 有多个电话号码，拆分为多行
-            # 处理姓名列（如果存在）
-            name = row.get('姓名', '') if '姓名' in df.columns else ''
-            split_names = split_name(name, len(phones))
-
-            for i, phone in enumerate(phones[:2]):  # 只处理前两个号码
-                new_row = row.copy()
-                new_row[phone_column] = phone
+    """处理电话号码：一个单元格中有多个号码时拆分为多行（每个号码一行，姓名同步拆分），整表向量化处理"""
+    # 提取所有11位电话号码
+    phones = df[phone_column].astype(str).str.findall(r'1\d{10}')
+    counts = phones.str.len().fillna(0).to_numpy(dtype=int)
+    multi = counts >= 2
+    if not multi.any():
+        # 只有一个或没有电话号码的行保留原数据
+        return df
+
+    # 有多个电话号码的行按号码展开为多行
+    split = df[multi].assign(**{phone_column: phones[multi]}).explode(phone_column)
+    split_counts = np.repeat(counts[multi], counts[multi])
+    first_rows = np.repeat(np.cumsum(counts[multi]) - counts[multi], counts[multi])
+    positions = np.arange(len(split)) - first_rows
+    if '姓名' in df.columns:
+        split['姓名'] = split_names(split['姓名'], split_counts, positions).to_numpy()
+
+    # 按原行顺序合并未拆分的行和拆分出的行
+    order = np.concatenate([np.flatnonzero(~multi), np.repeat(np.flatnonzero(multi), counts[multi])])
+    result = pd.concat([df[~multi], split])
+    return result.iloc[np.argsort(order, kind="stable")]
+
+
+def choose_phone_column(df):
+    """自动识别联系电话列，无法确定时让用户选择"""
+    phone_candidates = find_phone_column(df)
+    if len(phone_candidates) == 1:
+        phone_column = phone_candidates[0]
+        print(f"自动识别联系电话列为: {phone_column}")
+        return phone_column
+    print("未找到明确的联系电话列或找到多个候选列")
+    return select_phone_column(df)
 
-                # 更新姓名
-                if '姓名' in df.columns:
-                    new_row['姓名'] = split_names[i] if i < len(split_names) else name
 
-                processed_rows.append(new_row)
-        else:
-            # 没有找到有效的电话号码，保留原数据
-            processed_rows.append(row)
+def stream_process_file(input_path, output_path, chunk_size=50000):
+    """
+    流式处理大文件：逐块读取、拆分、写出，内存占用只与chunk_size有关
+    自动选用当前环境中最快的读写后端（calamine / xlsxwriter，未安装时使用openpyxl）
+    """
+    reader = excel_stream.available_reader_backends()[-1]
+    writer = excel_stream.available_writer_backends()[-1]
+    columns = excel_stream.read_header(input_path, reader)
+    phone_column = choose_phone_column(pd.DataFrame(columns=columns))
 
-    return pd.DataFrame(processed_rows)
+    print(f"正在流式处理数据（每块 {chunk_size} 行，读取：{reader}，写入：{writer}）...")
+    with excel_stream.StreamWriter(output_path, columns, writer) as out:
+        for chunk in excel_stream.iter_chunks(input_path, chunk_size, reader):
+            out.write_frame(process_phone_numbers(chunk, phone_column))
+            print(f"已写出 {out.rows_written} 行")
 
 
 def main():
@@ -107,6 +143,22 @@ def main():
         else:
             print("文件不存在，请重新输入")
 
+    # 生成输出文件路径
+    base, ext = os.path.splitext(input_path)
+    output_path = f"{base}_processed{ext}"
+
+    # 大文件使用流式模式，避免整表载入内存（.xls需安装python-calamine才能流式读取，输出为.xlsx）
+    streaming = input("是否启用流式模式（适合几十万行以上的大文件，y/N）: ").strip().lower() == 'y'
+    if streaming and (file_ext != '.xls' or 'calamine' in excel_stream.available_reader_backends()):
+        if file_ext == '.xls':
+            output_path = f"{base}_processed.xlsx"
+        try:
+            stream_process_file(input_path, output_path)
+            print(f"数据处理完成并保存到 {output_path}")
+        except Exception as e:
+            print(f"流式处理失败: {str(e)}")
+        return
+
     # 读取文件
     print("正在读取文件...")
     try:
@@ -122,22 +174,12 @@ def main():
     print(df.head())
 
     # 确定联系电话列
-    phone_candidates = find_phone_column(df)
-    if len(phone_candidates) == 1:
-        phone_column = phone_candidates[0]
-        print(f"自动识别联系电话列为: {phone_column}")
-    else:
-        print("未找到明确的联系电话列或找到多个候选列")
-        phone_column = select_phone_column(df)
+    phone_column = choose_phone_column(df)
 
     # 处理数据
     print("正在处理数据...")
     processed_df = process_phone_numbers(df, phone_column)
 
-    # 生成输出文件路径
-    base, ext = os.path.splitext(input_path)
-    output_path = f"{base}_processed{ext}"
-
     # 保存处理后的数据
     print(f"正在保存处理后的数据到 {output_path}...")
     try:
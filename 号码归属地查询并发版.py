@@ -1,42 +1,60 @@
 import pandas as pd
 import requests
-import re
 import time
 import os
+import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import tqdm  # 修改导入方式以避免模块调用错误
+import segment_db
+import result_cache
+import http_client
+import lookup_trace
+import excel_stream
+from checkpoint import Journal, file_fingerprint
+from concurrency import AIMDController
+from phone_column import clean_phone_column
 
+# Excel必须包含的表头
+REQUIRED_COLUMNS = ["序号", "姓名", "性别", "民族", "联系电话", "归属地", "运营商"]
+# 表示查询失败的结果前缀（用于自适应并发判断上游是否出错）
+FAILURE_PREFIXES = ("网络错误", "API查询失败", "解析错误")
 
-def clean_phone_number(phone):
-    """清洗手机号码：去除非数字字符，返回纯数字"""
-    if pd.isna(phone):
-        return ""
-    phone_str = str(phone)
-    return re.sub(r"\D", "", phone_str)  # 保留纯数字
 
+def format_phone_info(data):
+    """将API返回的data字段转换为 (归属地, 运营商)"""
+    province = data.get("province", "")
+    city = data.get("city", "")
+    sp = data.get("sp", "")
+    location = f"{province}{city}" if (province or city) else "未知地区"
+    operator = sp if sp else "未知运营商"
+    return (location, operator)
 
+
+@lookup_trace.traced_lookup
 def get_phone_info(phone_number):
     """调用API查询单个手机号的归属地和运营商"""
     if len(phone_number) != 11 or not phone_number.isdigit():
         return ("无效手机号", "无效手机号")
 
-    api_url = f"https://cx.shouji.360.cn/phonearea.php?number={phone_number}"
-
     try:
-        response = requests.get(api_url, timeout=8)
-        response.raise_for_status()
-        result = response.json()
+        # 优先查询本地号段表和本地缓存，都未命中才请求API
+        data = segment_db.lookup(phone_number)
+        if data is None:
+            data = result_cache.get(phone_number)
 
-        if result.get("code") == 0:
+        if data is None:
+            # 失败自动重试；上游熔断时等待恢复而不是直接写入错误
+            response = http_client.get(params={"number": phone_number}, timeout=8,
+                                       circuit_wait=http_client.BATCH_CIRCUIT_WAIT)
+            with lookup_trace.phase("parse"):
+                result = response.json()
+
+            if result.get("code") != 0:
+                return ("API查询失败", "API查询失败")
             data = result.get("data", {})
-            province = data.get("province", "")
-            city = data.get("city", "")
-            sp = data.get("sp", "")
-            location = f"{province}{city}" if (province or city) else "未知地区"
-            operator = sp if sp else "未知运营商"
-            return (location, operator)
-        else:
-            return ("API查询失败", "API查询失败")
+            result_cache.put(phone_number, data)
+
+        return format_phone_info(data)
 
     except requests.exceptions.RequestException as e:
         return (f"网络错误: {str(e)[:15]}", f"网络错误: {str(e)[:15]}")
@@ -44,59 +62,254 @@ def get_phone_info(phone_number):
         return (f"解析错误: {str(e)[:15]}", f"解析错误: {str(e)[:15]}")
 
 
-def process_row(row):
-    """处理单行数据：清洗手机号并查询信息（供线程调用）"""
-    index, data = row
-    original_phone = data["联系电话"]
-    cleaned_phone = clean_phone_number(original_phone)
-    location, operator = get_phone_info(cleaned_phone)
-    return (index, location, operator)  # 返回索引和结果，用于后续写入
+def is_lookup_ok(info):
+    """判断 (归属地, 运营商) 查询结果是否成功"""
+    return not info[0].startswith(FAILURE_PREFIXES)
+
+
+def plan_queries(cleaned_phones):
+    """
+    查询规划：归属地和运营商由号码前7位（号段）决定，同一号段只需查询一次
+    :param cleaned_phones: 清洗后的手机号Series
+    :return: (每行对应的号段Series（无效号码为NaN）, {号段: 代表号码})
+    """
+    valid = cleaned_phones.str.fullmatch(r"\d{11}")
+    prefixes = cleaned_phones.str[:7].where(valid)
+    representatives = cleaned_phones[valid].groupby(prefixes[valid]).first()
+    return prefixes, representatives.to_dict()
 
 
-def batch_query_excel(excel_path, max_workers=10):
-    """多线程批量处理Excel，max_workers控制并发数，结果保存到新文件"""
+def query_numbers(numbers, max_workers=10, adaptive=True, on_result=None, controller=None, show_progress=True):
+    """
+    多线程查询 {键: 号码}，返回 {键: (归属地, 运营商)}
+    adaptive为True时max_workers作为并发上限，实际并发数由AIMD控制器根据吞吐量和错误率自动调整
+    on_result为可选回调 on_result(键, (归属地, 运营商))，每得到一个结果在主线程中调用一次
+    controller为可选的AIMD控制器，多次调用时传入同一个可沿用已调整好的并发数（如流式处理的各块）
+    show_progress为False时不显示tqdm进度条（由调用方通过on_result汇报进度，如服务端后台任务）
+    """
+    if controller is None and adaptive:
+        controller = AIMDController(maximum=max_workers)
+    results = {}
+    futures = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
     try:
-        # 读取Excel文件
-        df = pd.read_excel(excel_path, engine="openpyxl")
+        if controller:
+            futures = {executor.submit(controller.run, get_phone_info, number, is_ok=is_lookup_ok): key
+                       for key, number in numbers.items()}
+        else:
+            futures = {executor.submit(get_phone_info, number): key for key, number in numbers.items()}
+
+        # 实时获取结果并显示进度（打包的窗口程序没有stderr，此时不创建进度条）
+        progress = None
+        if show_progress and sys.stderr is not None:
+            progress = tqdm.tqdm(as_completed(futures), total=len(futures), desc="处理进度")
+        for future in progress if progress is not None else as_completed(futures):
+            key = futures[future]
+            results[key] = future.result()
+            if on_result:
+                on_result(key, results[key])
+            if controller and progress is not None:
+                progress.set_postfix(并发=controller.limit, refresh=False)
+    except KeyboardInterrupt:
+        # 中断时取消尚未开始的查询，不再等待它们；已完成但还未处理的结果先交给回调（写入断点日志）再退出
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future, key in futures.items():
+            if key not in results and future.done() and not future.cancelled() and future.exception() is None:
+                results[key] = future.result()
+                if on_result:
+                    on_result(key, results[key])
+        raise
+    finally:
+        executor.shutdown(wait=False)
+
+    if controller and controller.completed:
+        stats = controller.stats()
+        print(f"自适应并发：最终并发数 {stats['limit']}，上游失败 {stats['failures']} 次，"
+              f"平均耗时 {stats['avg_latency'] * 1000:.0f} 毫秒")
+    return results
+
+
+def lookup_phone_column(phones, max_workers=10, engine="thread", adaptive=True, memo=None, journal=None,
+                        progress=None, controller=None):
+    """
+    查询整列手机号：先按号段去重，每个号段只查询一次，再将结果按号段关联回每一行
+    :param phones: 原始手机号Series（索引为数据行号）
+    :param max_workers: 并发数（asyncio引擎下为同时进行的最大请求数）
+    :param engine: 查询引擎，"thread"为多线程，"async"为asyncio（需安装aiohttp）
+    :param adaptive: 多线程引擎是否自适应调整并发数（max_workers为上限）
+    :param memo: 可选的 {号段: (归属地, 运营商)} 字典，已有结果的号段不再查询，新的成功结果会写回（用于分块处理）
+    :param journal: 可选的断点日志（checkpoint.Journal），已记录的行直接取结果，新完成的行边查询边写入
+    :param progress: 可选回调 progress(行数, (归属地, 运营商))，每个号段查询完成时以该号段涉及的行数调用
+    :param controller: 可选的AIMD控制器（多线程引擎），分块处理时各块共用，并发数不会每块重新开始
+    :return: 与phones索引对齐、包含"归属地"和"运营商"两列的DataFrame
+    """
+    done = journal.results_for(phones.index) if journal else {}
+    if done:
+        print(f"断点续查：跳过已完成的 {len(done)} 行")
+        previous = pd.DataFrame.from_dict(done, orient="index", columns=["归属地", "运营商"])
+        if len(done) == len(phones):
+            return previous.reindex(phones.index)
+    pending = phones.drop(index=list(done)) if done else phones
+
+    cleaned = clean_phone_column(pending)
+    prefixes, numbers = plan_queries(cleaned)
+    known = {}
+    if memo is not None:
+        known = {key: memo[key] for key in numbers if key in memo}
+        numbers = {key: number for key, number in numbers.items() if key not in memo}
+    print(f"共 {len(pending)} 个号码，去重后需查询 {len(numbers)} 个号段")
+
+    on_result = None
+    if journal is not None or progress is not None:
+        rows_by_prefix = cleaned.groupby(prefixes).groups
 
-        # 验证表头
-        required_columns = ["序号", "姓名", "性别", "民族", "联系电话", "归属地", "运营商"]
-        if not all(col in df.columns for col in required_columns):
-            print("❌ Excel表头不符合要求！需包含指定列")
-            return
+        def on_result(prefix, info):
+            rows = rows_by_prefix[prefix]
+            # 查询成功的号段立即写入日志，失败的行留待下次运行重试
+            if journal is not None and is_lookup_ok(info):
+                journal.write((row, cleaned[row], *info) for row in rows)
+            if progress is not None:
+                progress(len(rows), info)
 
-        total_rows = len(df)
-        print(f"✅ 成功读取 {total_rows} 行数据，启动多线程查询（并发数：{max_workers}）...")
+    if engine == "async":
+        import async_engine  # 可选依赖，按需导入
+        results = async_engine.query_numbers(numbers, format_phone_info, max_workers, on_result=on_result)
+    else:
+        # 调用方自行汇报进度时（如服务端后台任务）不再显示进度条
+        results = query_numbers(numbers, max_workers, adaptive, on_result, controller, show_progress=progress is None)
+    if memo is not None:
+        memo.update((key, info) for key, info in results.items() if is_lookup_ok(info))
+    result_df = pd.DataFrame.from_dict({**known, **results}, orient="index", columns=["归属地", "运营商"])
 
-        # 创建线程池并提交任务
-        results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有行的处理任务
-            futures = [executor.submit(process_row, row) for row in df.iterrows()]
+    # 按号段关联回每一行，无效号码填充提示
+    joined = prefixes.to_frame("号段").join(result_df, on="号段")
+    joined = joined[["归属地", "运营商"]].fillna("无效手机号")
 
-            # 实时获取结果并显示进度（修复tqdm调用方式）
-            for future in tqdm.tqdm(as_completed(futures), total=total_rows, desc="处理进度"):
-                results.append(future.result())
+    if journal is not None:
+        # 无需查询即得到结果的行（无效号码、已知号段）也写入日志
+        instant = ~prefixes.isin(list(numbers)) & ~joined["归属地"].str.startswith(FAILURE_PREFIXES)
+        rows = instant.index[instant]
+        journal.write(zip(rows, cleaned[rows], joined.loc[rows, "归属地"], joined.loc[rows, "运营商"]))
+    if done:
+        # 合并日志中已完成的结果，恢复原有行顺序
+        joined = pd.concat([joined, previous]).reindex(phones.index)
+    return joined
 
-        # 将结果写回DataFrame（按索引排序，确保顺序正确）
-        for index, location, operator in results:
-            df.at[index, "归属地"] = location
-            df.at[index, "运营商"] = operator
+
+def stream_query_excel(excel_path, output_path, max_workers=10, engine="thread", adaptive=True,
+                       chunk_size=50000, reader="openpyxl", writer="openpyxl", journal=None):
+    """
+    流式处理：逐块读取→查询→写出，内存占用只与chunk_size有关，适合几十万行以上的大文件
+    reader/writer为读写后端（见 excel_stream.READER_BACKENDS / WRITER_BACKENDS），
+    journal为可选的断点日志，返回处理的行数
+    """
+    columns = excel_stream.read_header(excel_path, reader)
+    if not all(col in columns for col in REQUIRED_COLUMNS):
+        print("❌ Excel表头不符合要求！需包含指定列")
+        return 0
+
+    memo = {}  # 跨块共享的号段结果，后续块中出现的相同号段不再查询
+    # 各块共用一个并发控制器，沿用前面各块调整好的并发数
+    controller = AIMDController(maximum=max_workers) if adaptive and engine != "async" else None
+    total_rows = 0
+    with excel_stream.StreamWriter(output_path, columns, writer) as out:
+        for chunk in excel_stream.iter_chunks(excel_path, chunk_size, reader):
+            results = lookup_phone_column(chunk["联系电话"], max_workers, engine, adaptive, memo, journal,
+                                          controller=controller)
+            chunk["归属地"] = results["归属地"]
+            chunk["运营商"] = results["运营商"]
+            out.write_frame(chunk)
+            total_rows += len(chunk)
+            print(f"已处理并写出 {total_rows} 行")
+    return total_rows
+
+
+def batch_query_excel(excel_path, max_workers=10, segment_path=None, engine="thread", adaptive=True, qps=None,
+                      streaming=False, chunk_size=50000, reader="openpyxl", writer="openpyxl", resume=True):
+    """
+    并发批量处理Excel，结果保存到新文件
+    max_workers控制并发数（adaptive为True时作为自适应并发的上限），segment_path为可选的本地号段表，
+    engine选择多线程("thread")或asyncio("async")引擎，qps为上游每秒最大请求数（None表示不限速），
+    streaming为True时按chunk_size行分块流式读写（reader/writer选择读写后端），适合超大文件，
+    resume为True时边查询边写入断点日志（结果文件旁的 .journal.jsonl），中断后重新运行会跳过已完成的行
+    """
+    http_client.configure(pool_size=max_workers)  # 连接池与线程数一致，每个线程都能复用长连接
+    if qps:
+        http_client.set_rate_limit(qps, burst=max(1, min(max_workers, qps)))
+
+    journal = None
+    try:
+        # 加载本地号段表（可选）
+        if segment_path:
+            segment_index = segment_db.load_default_index(segment_path)
+            print(f"✅ 已加载本地号段表，共 {len(segment_index)} 个号段")
 
         # 生成新文件名，避免覆盖原文件
         file_dir, file_name = os.path.split(excel_path)
         file_base, file_ext = os.path.splitext(file_name)
+        if streaming and file_ext.lower() == ".xls":
+            file_ext = ".xlsx"  # 流式写入不支持旧版.xls格式
         new_file_name = f"{file_base}_已查询{file_ext}"
         new_file_path = os.path.join(file_dir, new_file_name)
 
-        # 保存结果到新文件
-        df.to_excel(new_file_path, index=False, engine="openpyxl")
+        # 断点日志：记录每行的查询结果，同一输入文件重新运行时从中断处继续
+        journal = None
+        if resume:
+            journal = Journal(os.path.join(file_dir, f"{file_base}_已查询.journal.jsonl"),
+                              file_fingerprint(excel_path))
+            if journal.completed:
+                print(f"✅ 检测到断点记录，已完成 {len(journal.completed)} 行，将从中断处继续")
+
+        start_time = time.perf_counter()
+        if streaming:
+            # 流式模式：逐块读取、查询、写出，不把整个文件载入内存
+            print(f"✅ 流式模式（每块 {chunk_size} 行，读取：{reader}，写入：{writer}）...")
+            total_rows = stream_query_excel(excel_path, new_file_path, max_workers, engine, adaptive,
+                                            chunk_size, reader, writer, journal)
+            if not total_rows:
+                return
+        else:
+            # 读取Excel文件
+            df = pd.read_excel(excel_path, engine="openpyxl")
+
+            # 验证表头
+            if not all(col in df.columns for col in REQUIRED_COLUMNS):
+                print("❌ Excel表头不符合要求！需包含指定列")
+                return
+
+            total_rows = len(df)
+            engine_name = "asyncio" if engine == "async" else "多线程"
+            print(f"✅ 成功读取 {total_rows} 行数据，启动{engine_name}查询（并发数：{max_workers}）...")
+
+            # 按号段去重后查询，并将结果整列写回
+            results = lookup_phone_column(df["联系电话"], max_workers, engine, adaptive, journal=journal)
+            df["归属地"] = results["归属地"]
+            df["运营商"] = results["运营商"]
+
+            # 保存结果到新文件
+            df.to_excel(new_file_path, index=False, engine="openpyxl")
+
+        if journal:
+            if len(journal.completed) >= total_rows:
+                journal.remove()  # 全部成功，不再需要断点记录
+            else:
+                journal.close()
+                print(f"⚠️ 有 {total_rows - len(journal.completed)} 行查询失败，重新运行将只重试这些行")
+
+        elapsed = time.perf_counter() - start_time
+        print(f"⏱ 总耗时 {elapsed:.2f} 秒（{total_rows / elapsed if elapsed else 0:.0f} 行/秒）")
         print(f"\n🎉 全部完成！结果已保存至新文件：{new_file_path}")
+        cache_stats = result_cache.stats()
+        print(f"📦 缓存命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次（命中率 {cache_stats['hit_ratio']:.1%}）")
 
     except FileNotFoundError:
         print(f"❌ 未找到文件：{excel_path}")
     except Exception as e:
         print(f"❌ 程序出错：{str(e)}")
+    finally:
+        if journal and not journal.closed:
+            journal.close()
+            print(f"💾 已完成 {len(journal.completed)} 行的结果已保存，重新运行将从中断处继续")
 
 
 if __name__ == "__main__":
@@ -109,7 +322,19 @@ if __name__ == "__main__":
         import tqdm
 
     excel_path = input("请输入Excel文件路径：").strip()
-    # 可根据网络情况调整并发数（建议5-20之间）
-    max_workers_input = input("请输入并发数（建议5-20）：").strip()
-    max_workers = int(max_workers_input) if max_workers_input else 10
-    batch_query_excel(excel_path, max_workers)
+    # 多线程引擎会根据吞吐量和错误率在1到该值之间自动调整并发数
+    max_workers_input = input("请输入最大并发数（自动调整，默认30）：").strip()
+    max_workers = int(max_workers_input) if max_workers_input else 30
+    # asyncio引擎单线程即可保持数百个请求同时进行，需安装aiohttp
+    engine_input = input("请选择查询引擎（1=多线程，2=asyncio，默认1）：").strip()
+    engine = "async" if engine_input == "2" else "thread"
+    segment_path = input("请输入号段数据文件路径（CSV/JSON，可留空）：").strip()
+    # 上游允许的每秒请求数，留空则不限速
+    qps_input = input("请输入每秒最大请求数（可留空）：").strip()
+    qps = float(qps_input) if qps_input else None
+    # 流式模式分块读写，内存占用与文件大小无关；自动选用当前环境中最快的读写后端
+    streaming = input("是否启用流式模式（适合几十万行以上的大文件，y/N）：").strip().lower() == "y"
+    http_client.enable_dns_cache()  # 同一主机只解析一次DNS
+    batch_query_excel(excel_path, max_workers, segment_path or None, engine, qps=qps, streaming=streaming,
+                      reader=excel_stream.available_reader_backends()[-1],
+                      writer=excel_stream.available_writer_backends()[-1])
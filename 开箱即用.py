@@ -1,12 +1,21 @@
+import time
+_STARTED_AT = time.perf_counter()  # 程序开始运行的时间，用于统计启动耗时
+
 import os
 import sys
+import json
 import threading
 import webbrowser
-import time
-from flask import Flask, request, jsonify
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
-import requests
 import socket
+import result_cache
+import http_client
+import metrics
+import proxy_lookup
+import wsgi_server
+# jobs（依赖pandas，导入较慢）在第一次创建后台任务时才导入，缩短启动时间
 
 # 前端HTML内容（内嵌，无需外部文件）
 HTML_CONTENT = """<!DOCTYPE html>
@@ -17,7 +26,6 @@ HTML_CONTENT = """<!DOCTYPE html>
     <title>手机号码归属地批量查询工具</title>
     <script src="https://cdn.tailwindcss.com"></script>
     <link href="https://cdn.jsdelivr.net/npm/font-awesome@4.7.0/css/font-awesome.min.css" rel="stylesheet">
-    <script src="https://cdn.jsdelivr.net/npm/xlsx@0.18.5/dist/xlsx.full.min.js"></script>
     <script>
         tailwind.config = {
             theme: {
@@ -120,13 +128,21 @@ HTML_CONTENT = """<!DOCTYPE html>
                         </div>
 
                         <div>
-                            <label for="concurrent" class="block text-sm font-medium text-gray-700 mb-1">并发查询数量</label>
+                            <label for="concurrent" class="block text-sm font-medium text-gray-700 mb-1">最大并发查询数量</label>
                             <div class="flex items-center">
                                 <input type="range" id="concurrent" min="5" max="30" value="15" 
                                     class="w-full h-2 bg-gray-200 rounded-lg appearance-none cursor-pointer accent-primary">
                                 <span id="concurrent-value" class="ml-3 min-w-[3rem] text-center font-medium">15</span>
                             </div>
-                            <p class="text-xs text-gray-500 mt-1">推荐设置：10-20</p>
+                            <p class="text-xs text-gray-500 mt-1">实际并发数会根据响应速度和错误率在1到该值之间自动调整</p>
+                        </div>
+
+                        <div>
+                            <label class="flex items-center text-sm font-medium text-gray-700">
+                                <input type="checkbox" id="server-mode" class="mr-2 accent-primary">
+                                服务端后台处理
+                            </label>
+                            <p id="server-mode-hint" class="text-xs text-gray-500 mt-1">文件上传到本地服务处理，刷新或关闭页面不会中断；结果只保留第一个工作表的数据，不保留格式</p>
                         </div>
                     </div>
                 </div>
@@ -208,20 +224,147 @@ HTML_CONTENT = """<!DOCTYPE html>
         </footer>
     </div>
 
+    <!-- Excel解析和结果文件生成在Web Worker中执行（见 createSheetWorker），避免大文件阻塞页面 -->
+    <script type="text/js-worker" id="sheet-worker-source">
+        importScripts('https://cdn.jsdelivr.net/npm/xlsx@0.18.5/dist/xlsx.full.min.js');
+
+        let workbook = null; // 原工作簿只保存在Worker中，下载时在此生成结果
+
+        // 按原始行顺序一次生成结果工作表：22位号码拆分出的第二个号码紧跟在原行之后，
+        // 其余单元格沿用原工作表的单元格对象，耗时只与行数成正比，与查询完成的先后顺序无关
+        function buildResultSheet(sourceSheet, { items, phoneColumn, locationColumn, operatorColumn, headers }) {
+            const range = XLSX.utils.decode_range(sourceSheet['!ref'] || 'A1:A1');
+            const lastColumn = Math.max(range.e.c, range.s.c + operatorColumn);
+
+            // 原始行 → 该行的查询项（拆分的两个号码按先后顺序排列）
+            const itemsByRow = new Map();
+            for (const item of items) {
+                if (!itemsByRow.has(item.originalRowIndex)) {
+                    itemsByRow.set(item.originalRowIndex, []);
+                }
+                itemsByRow.get(item.originalRowIndex).push(item);
+            }
+
+            const sheet = {};
+            // 列号为页面数据中的列序号，相对工作表范围的起始列
+            const setCell = (r, c, value) => {
+                sheet[XLSX.utils.encode_cell({ r, c: range.s.c + c })] = { t: 's', v: String(value) };
+            };
+
+            // 页面数据的第 i 行对应工作表范围内的第 i 行，第0行为表头
+            let outRow = range.s.r;
+            for (let rowIndex = 0; rowIndex <= range.e.r - range.s.r; rowIndex++) {
+                const sourceRow = range.s.r + rowIndex;
+                for (const item of itemsByRow.get(rowIndex) || [null]) {
+                    for (let c = range.s.c; c <= range.e.c; c++) {
+                        const cell = sourceSheet[XLSX.utils.encode_cell({ r: sourceRow, c })];
+                        if (cell) {
+                            sheet[XLSX.utils.encode_cell({ r: outRow, c })] = cell;
+                        }
+                    }
+
+                    if (rowIndex === 0) {
+                        setCell(outRow, locationColumn, headers[0]);
+                        setCell(outRow, operatorColumn, headers[1]);
+                    } else if (item && item.location !== undefined) {
+                        if (item.pairIndex === 1 || item.pairIndex === 2) {
+                            setCell(outRow, phoneColumn, item.phoneNumber);
+                        }
+                        setCell(outRow, locationColumn, item.location);
+                        setCell(outRow, operatorColumn, item.operator);
+                    }
+                    outRow++;
+                }
+            }
+
+            sheet['!ref'] = XLSX.utils.encode_range({
+                s: { r: range.s.r, c: range.s.c },
+                e: { r: Math.max(outRow - 1, range.s.r), c: lastColumn }
+            });
+            if (sourceSheet['!cols']) {
+                sheet['!cols'] = sourceSheet['!cols'];
+            }
+            // 有行被拆分时合并单元格的位置会错开，不再保留
+            if (sourceSheet['!merges'] && outRow - 1 === range.e.r) {
+                sheet['!merges'] = sourceSheet['!merges'];
+            }
+            return sheet;
+        }
+
+        const handlers = {
+            // 解析Excel，返回第一个工作表的数据（第0行为表头）；headerOnly 时只读取表头行
+            parse({ buffer, headerOnly }) {
+                workbook = XLSX.read(new Uint8Array(buffer), { type: 'array', sheetRows: headerOnly ? 1 : 0 });
+                const worksheet = workbook.Sheets[workbook.SheetNames[0]];
+                return { rows: XLSX.utils.sheet_to_json(worksheet, { header: 1 }) };
+            },
+
+            // 生成结果文件：只替换第一个工作表，其余工作表与原工作簿共用；文件内容以可转移的ArrayBuffer返回
+            write(options) {
+                const firstSheetName = workbook.SheetNames[0];
+                const resultSheet = buildResultSheet(workbook.Sheets[firstSheetName], options);
+                const resultWorkbook = { ...workbook, Sheets: { ...workbook.Sheets, [firstSheetName]: resultSheet } };
+                const buffer = XLSX.write(resultWorkbook, { bookType: 'xlsx', type: 'array' });
+                return [{ buffer }, [buffer]];
+            },
+
+            reset() {
+                workbook = null;
+                return {};
+            }
+        };
+
+        // 消息格式：{ id, type, ...参数 }；返回 { id, type: 'done' | 'error' | 'progress', ... }
+        self.onmessage = (e) => {
+            const { id, type } = e.data;
+            try {
+                const progress = data => self.postMessage({ id, type: 'progress', ...data });
+                const output = handlers[type](e.data, progress);
+                const [result, transfer] = Array.isArray(output) ? output : [output, []];
+                self.postMessage({ id, type: 'done', ...result }, transfer);
+            } catch (error) {
+                self.postMessage({ id, type: 'error', message: error.message || String(error) });
+            }
+        };
+    </script>
+
+    <!-- 自适应并发控制器和工作池：启动时内嵌 concurrency.js（与 号码归属地查询并发网页版.html 共用） -->
+    <script>
+__CONCURRENCY_JS__
+    </script>
+
     <script>
         let selectedFile = null;
-        let workbook = null;
-        let processedWorkbook = null;
-        let originalData = []; // 保存原始数据用于处理
+        let originalData = []; // 第一个工作表的数据（第0行为表头），原工作簿保存在Worker中
         let concurrentCount = 15;
         let phoneColumn = ''; // 手机号码所在列，空表示自动识别
         let totalNumbers = 0; // 总手机号码数量（包括拆分后的）
         let processedNumbers = 0; // 已处理的手机号码数量
+        let processingNumbers = 0; // 正在查询的手机号码数量
+        let errorNumbers = 0; // 查询失败的手机号码数量
+        // "最近处理"日志的环形缓冲区：只保留最近 LOG_SIZE 条，显示的DOM节点数量固定
+        const LOG_SIZE = 50;
+        const logBuffer = new Array(LOG_SIZE);
+        let logStart = 0; // 最早一条日志在缓冲区中的位置
+        let logLength = 0;
+        let logDirty = false;
+        let renderScheduled = false;
         let locationColumn; // 归属地列索引
         let operatorColumn; // 运营商列索引
 
         // 代理地址会由后端自动注入
         const localProxyUrl = '__PROXY_URL__';
+        // 后台任务接口地址，以及保存当前任务ID的localStorage键（刷新页面后据此恢复任务）
+        const jobsUrl = localProxyUrl.replace(/query$/, 'jobs');
+        const JOB_STORAGE_KEY = 'phoneAreaJobId';
+        const JOB_POLL_INTERVAL = 2000; // 无法使用进度推送时查询任务状态的间隔（毫秒）
+        // 超过该大小的文件只在浏览器中读取表头，数据交由服务端处理
+        const LARGE_FILE_SIZE = 20 * 1024 * 1024;
+        let serverJobId = null; // 当前后台任务ID
+        let processingQueue = []; // 待查询号码队列，查询结果记录在各队列项上
+        const sheetWorker = createSheetWorker();
+        const workerCalls = new Map(); // 调用ID → { resolve, reject, onProgress }
+        let workerCallId = 0;
 
         // DOM元素
         const dropArea = document.getElementById('drop-area');
@@ -235,6 +378,8 @@ HTML_CONTENT = """<!DOCTYPE html>
         const concurrentSlider = document.getElementById('concurrent');
         const concurrentValue = document.getElementById('concurrent-value');
         const phoneColumnSelect = document.getElementById('phone-column');
+        const serverModeCheckbox = document.getElementById('server-mode');
+        const serverModeHint = document.getElementById('server-mode-hint');
         const startProcess = document.getElementById('start-process');
         const progressSection = document.getElementById('progress-section');
         const overallProgressBar = document.getElementById('overall-progress-bar');
@@ -282,6 +427,9 @@ HTML_CONTENT = """<!DOCTYPE html>
             startProcess.addEventListener('click', startProcessing);
             downloadResult.addEventListener('click', downloadResultFile);
             processAnother.addEventListener('click', resetAll);
+
+            // 恢复刷新前未结束的后台任务
+            resumeServerJob();
         }
 
         function handleFile(file) {
@@ -295,29 +443,44 @@ HTML_CONTENT = """<!DOCTYPE html>
             fileSize.textContent = formatFileSize(file.size);
             fileInfo.classList.remove('hidden');
 
-            const reader = new FileReader();
-            reader.onload = function(e) {
-                try {
-                    const data = new Uint8Array(e.target.result);
-                    workbook = XLSX.read(data, { type: 'array' });
-
-                    // 获取第一个工作表
-                    const firstSheetName = workbook.SheetNames[0];
-                    const worksheet = workbook.Sheets[firstSheetName];
-                    originalData = XLSX.utils.sheet_to_json(worksheet, { header: 1 });
-
-                    // 生成列选项
-                    generateColumnOptions();
-
-                    // 显示设置区域和操作按钮
-                    settingsSection.classList.remove('hidden');
-                    actionButtons.classList.remove('hidden');
-
-                } catch (error) {
-                    alert('无法解析Excel文件，请检查格式');
-                    console.error('Excel解析错误:', error);
+            // 大文件只读取表头（用于选择电话列），必须使用服务端后台处理
+            const headerOnly = file.size > LARGE_FILE_SIZE;
+            if (file.name.endsWith('.xls')) {
+                // 服务端后台任务只支持.xlsx，.xls文件只能在浏览器中处理
+                if (headerOnly) {
+                    alert('文件较大，需由服务端处理，请先将.xls文件另存为.xlsx格式');
                     resetFileSelection();
+                    return;
                 }
+                serverModeCheckbox.checked = false;
+                serverModeCheckbox.disabled = true;
+                serverModeHint.textContent = '服务端处理仅支持.xlsx格式，.xls文件将在浏览器中处理';
+            } else if (headerOnly) {
+                serverModeCheckbox.checked = true;
+                serverModeCheckbox.disabled = true;
+                serverModeHint.textContent = '文件较大，将由服务端后台处理（结果只保留第一个工作表的数据，不保留格式）';
+            }
+
+            // 文件内容转移给Worker解析
+            const reader = new FileReader();
+            reader.onload = function(e) {
+                const buffer = e.target.result;
+                callSheetWorker({ type: 'parse', buffer, headerOnly }, [buffer])
+                    .then(result => {
+                        originalData = result.rows;
+
+                        // 生成列选项
+                        generateColumnOptions();
+
+                        // 显示设置区域和操作按钮
+                        settingsSection.classList.remove('hidden');
+                        actionButtons.classList.remove('hidden');
+                    })
+                    .catch(error => {
+                        alert('无法解析Excel文件，请检查格式');
+                        console.error('Excel解析错误:', error);
+                        resetFileSelection();
+                    });
             };
             reader.readAsArrayBuffer(file);
         }
@@ -359,22 +522,30 @@ HTML_CONTENT = """<!DOCTYPE html>
 
         function resetFileSelection() {
             selectedFile = null;
-            workbook = null;
             originalData = [];
+            callSheetWorker({ type: 'reset' });
             fileInput.value = '';
             fileInfo.classList.add('hidden');
             settingsSection.classList.add('hidden');
             actionButtons.classList.add('hidden');
+            if (serverModeCheckbox.disabled) {
+                serverModeCheckbox.checked = false;  // 取消因文件大小或格式强制设置的选项，恢复默认的浏览器处理
+            }
+            serverModeCheckbox.disabled = false;
+            serverModeHint.textContent = '文件上传到本地服务处理，刷新或关闭页面不会中断；结果只保留第一个工作表的数据，不保留格式';
         }
 
         function resetAll() {
             resetFileSelection();
+            processingQueue = [];
+            serverJobId = null;
+            localStorage.removeItem(JOB_STORAGE_KEY);
             progressSection.classList.add('hidden');
             resultSection.classList.add('hidden');
         }
 
         function startProcessing() {
-            if (!workbook || !selectedFile || originalData.length === 0) return;
+            if (!selectedFile || originalData.length === 0) return;
 
             // 获取用户选择的电话列
             const selectedPhoneColumn = phoneColumnSelect.value;
@@ -419,22 +590,20 @@ HTML_CONTENT = """<!DOCTYPE html>
             resultSection.classList.add('hidden');
 
             // 重置进度数据
-            overallProgressBar.style.width = '0%';
             totalNumbers = countTotalNumbers();
             processedNumbers = 0;
-            overallProgressText.textContent = `0/${totalNumbers}`;
-            completedCount.textContent = '0';
-            processingCount.textContent = '0';
-            errorCount.textContent = '0';
-            recentLog.innerHTML = '';
-
-            // 创建结果工作簿的深拷贝
-            processedWorkbook = JSON.parse(JSON.stringify(workbook));
-
-            // 更新工作簿中的表头
-            updateWorkbookHeaders();
+            processingNumbers = 0;
+            errorNumbers = 0;
+            clearLog();
+            renderProgress();
+
+            // 服务端后台处理：上传文件，由服务端完成查询
+            if (serverModeCheckbox.checked) {
+                startServerJob();
+                return;
+            }
 
-            // 开始处理数据
+            // 开始处理数据（原工作簿保持不变，结果在下载时合并）
             processWorkbook();
         }
 
@@ -458,32 +627,6 @@ HTML_CONTENT = """<!DOCTYPE html>
             }
         }
 
-        // 更新工作簿中的表头
-        function updateWorkbookHeaders() {
-            const firstSheetName = workbook.SheetNames[0];
-            const headerRow = originalData[0];
-
-            // 写入归属地表头
-            const locationColLetter = columnIndexToLetter(locationColumn);
-            processedWorkbook.Sheets[firstSheetName][`${locationColLetter}1`] = {
-                v: headerRow[locationColumn]
-            };
-
-            // 写入运营商表头
-            const operatorColLetter = columnIndexToLetter(operatorColumn);
-            processedWorkbook.Sheets[firstSheetName][`${operatorColLetter}1`] = {
-                v: headerRow[operatorColumn]
-            };
-
-            // 更新工作表范围（确保能包含新添加的列）
-            const sheet = processedWorkbook.Sheets[firstSheetName];
-            const range = XLSX.utils.decode_range(sheet['!ref'] || 'A1:A1');
-            if (range.e.c < operatorColumn) {
-                range.e.c = operatorColumn;
-                sheet['!ref'] = XLSX.utils.encode_range(range);
-            }
-        }
-
         // 计算总手机号码数量（包括拆分后的）
         function countTotalNumbers() {
             let count = 0;
@@ -507,10 +650,8 @@ HTML_CONTENT = """<!DOCTYPE html>
         }
 
         function processWorkbook() {
-            const firstSheetName = workbook.SheetNames[0];
-
             // 准备需要处理的所有号码（包括拆分后的）
-            const processingQueue = [];
+            processingQueue = [];
 
             // 从第1行开始（跳过表头）
             for (let rowIndex = 1; rowIndex < originalData.length; rowIndex++) {
@@ -557,170 +698,296 @@ HTML_CONTENT = """<!DOCTYPE html>
             }
 
             // 并发处理队列
-            processQueueInBatches(processingQueue, firstSheetName);
+            processQueueInBatches(processingQueue);
         }
 
-        // 批量处理队列
-        function processQueueInBatches(queue, sheetName) {
-            const batchSize = concurrentCount;
-            let currentIndex = 0;
+        // 上传文件并创建后台任务
+        async function startServerJob() {
+            const formData = new FormData();
+            formData.append('file', selectedFile);
+            formData.append('phone_column', phoneColumn);
+            formData.append('concurrency', concurrentCount);
+            addLog('正在上传文件...');
 
-            // 处理单个批次
-            function processBatch() {
-                if (currentIndex >= queue.length) {
-                    // 所有批次处理完成
-                    progressSection.classList.add('hidden');
-                    resultSection.classList.remove('hidden');
-                    return;
+            try {
+                const response = await fetch(jobsUrl, { method: 'POST', body: formData });
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.msg || `服务错误: ${response.status}`);
                 }
+                serverJobId = data.id;
+                localStorage.setItem(JOB_STORAGE_KEY, serverJobId);
+                addLog('文件已上传，服务端开始处理');
+                watchServerJob();
+            } catch (error) {
+                addLog(`创建后台任务失败: ${error.message}`);
+                progressSection.classList.add('hidden');
+                actionButtons.classList.remove('hidden');
+            }
+        }
 
-                const batch = queue.slice(currentIndex, currentIndex + batchSize);
-                currentIndex += batchSize;
-
-                const promises = batch.map(item => {
-                    return new Promise(async (resolve) => {
-                        processingCount.textContent = parseInt(processingCount.textContent) + 1;
-
-                        try {
-                            let location = '';
-                            let operator = '';
-
-                            if (item.phoneNumber.length === 11 && /^\d{11}$/.test(item.phoneNumber)) {
-                                // 有效的11位数字手机号
-                                const result = await getPhoneInfo(item.phoneNumber);
-                                location = result.location;
-                                operator = result.operator;
-                                addLog(`成功: ${item.phoneNumber} → ${location}, ${operator}`);
-                            } else {
-                                // 无效手机号
-                                location = '无效手机号';
-                                operator = '无效手机号';
-                                addLog(`失败: ${item.phoneNumber} → 无效手机号`);
-                                errorCount.textContent = parseInt(errorCount.textContent) + 1;
-                            }
-
-                            // 计算需要写入的行索引
-                            // 如果是一对号码中的第二个，需要插入新行
-                            let rowToWrite = item.originalRowIndex + 1; // +1 因为Excel行索引从1开始
-
-                            if (!item.isFirstOfPair) {
-                                // 插入新行
-                                insertRowInWorkbook(sheetName, rowToWrite);
-                                // 复制原始行数据到新行
-                                copyRowData(item.originalRowIndex, rowToWrite - 1);
-                            }
-
-                            // 归属地和运营商列
-                            const locationColLetter = columnIndexToLetter(locationColumn);
-                            const operatorColLetter = columnIndexToLetter(operatorColumn);
-
-                            // 写入归属地（强制写入，覆盖原有数据）
-                            processedWorkbook.Sheets[sheetName][`${locationColLetter}${rowToWrite}`] = {
-                                v: location
-                            };
-
-                            // 写入运营商（强制写入，覆盖原有数据）
-                            processedWorkbook.Sheets[sheetName][`${operatorColLetter}${rowToWrite}`] = {
-                                v: operator
-                            };
-
-                            // 如果是拆分后的号码，更新电话号码列
-                            if (item.pairIndex === 1) {
-                                const phoneColLetter = columnIndexToLetter(phoneColumn);
-                                processedWorkbook.Sheets[sheetName][`${phoneColLetter}${rowToWrite}`] = {
-                                    v: item.phoneNumber
-                                };
-                            } else if (item.pairIndex === 2) {
-                                const phoneColLetter = columnIndexToLetter(phoneColumn);
-                                processedWorkbook.Sheets[sheetName][`${phoneColLetter}${rowToWrite}`] = {
-                                    v: item.phoneNumber
-                                };
-                            }
-
-                        } catch (error) {
-                            const errorMsg = error.message || '查询失败';
-                            addLog(`失败: ${item.phoneNumber} → ${errorMsg}`);
-                            errorCount.textContent = parseInt(errorCount.textContent) + 1;
-
-                            // 即使出错也写入错误信息
-                            const locationColLetter = columnIndexToLetter(locationColumn);
-                            const operatorColLetter = columnIndexToLetter(operatorColumn);
-                            let rowToWrite = item.originalRowIndex + 1;
-
-                            if (!item.isFirstOfPair) {
-                                insertRowInWorkbook(sheetName, rowToWrite);
-                                copyRowData(item.originalRowIndex, rowToWrite - 1);
-                            }
-
-                            processedWorkbook.Sheets[sheetName][`${locationColLetter}${rowToWrite}`] = {
-                                v: errorMsg
-                            };
-
-                            processedWorkbook.Sheets[sheetName][`${operatorColLetter}${rowToWrite}`] = {
-                                v: errorMsg
-                            };
-                        } finally {
-                            processedNumbers++;
-                            completedCount.textContent = processedNumbers;
-                            processingCount.textContent = parseInt(processingCount.textContent) - 1;
-
-                            // 更新进度条
-                            const progress = Math.round((processedNumbers / totalNumbers) * 100);
-                            overallProgressBar.style.width = `${progress}%`;
-                            overallProgressText.textContent = `${processedNumbers}/${totalNumbers}`;
-
-                            resolve();
-                        }
-                    });
-                });
+        // 通过Server-Sent Events接收任务进度
+        function watchServerJob() {
+            const source = new EventSource(`${jobsUrl}/${serverJobId}/events`);
+            source.onmessage = (event) => {
+                const job = JSON.parse(event.data);
+                renderJobProgress(job);
+                if (job.state === 'done' || job.state === 'failed') {
+                    source.close();
+                }
+            };
+            source.onerror = () => {
+                // 连接中断时浏览器会自动重连；服务拒绝推送（推送连接过多）或任务已不存在时改为定时查询状态
+                if (source.readyState === EventSource.CLOSED) {
+                    pollServerJob();
+                }
+            };
+        }
 
-                // 等待当前批次完成后再处理下一批
-                Promise.all(promises).then(processBatch);
+        // 定时查询任务状态，直到任务结束
+        async function pollServerJob() {
+            try {
+                const response = await fetch(`${jobsUrl}/${serverJobId}`);
+                if (response.status === 404) {
+                    addLog('任务不存在（服务可能已重启），请重新上传文件');
+                    localStorage.removeItem(JOB_STORAGE_KEY);
+                    return;
+                }
+                if (response.ok) {
+                    const job = await response.json();
+                    renderJobProgress(job);
+                    if (job.state === 'done' || job.state === 'failed') {
+                        return;
+                    }
+                }
+            } catch (error) {
+                // 服务暂时不可用，稍后重试
             }
+            setTimeout(pollServerJob, JOB_POLL_INTERVAL);
+        }
 
-            // 开始处理第一批
-            processBatch();
+        // 显示后台任务进度
+        function renderJobProgress(job) {
+            totalNumbers = job.total;
+            processedNumbers = job.completed;
+            processingNumbers = job.state === 'running' ? totalNumbers - processedNumbers : 0;
+            errorNumbers = job.errors;
+
+            clearLog();
+            job.log.forEach(addLog);
+            scheduleRender();
+
+            if (job.state === 'done') {
+                finishProcessing();
+            } else if (job.state === 'failed') {
+                addLog(`任务失败: ${job.message}`);
+                localStorage.removeItem(JOB_STORAGE_KEY);
+            }
         }
 
-        // 在工作簿中插入新行
-        function insertRowInWorkbook(sheetName, rowIndex) {
-            const sheet = processedWorkbook.Sheets[sheetName];
+        // 页面刷新后恢复未完成（或已完成未下载）的后台任务
+        async function resumeServerJob() {
+            const jobId = localStorage.getItem(JOB_STORAGE_KEY);
+            if (!jobId) return;
 
-            // 确保工作表范围足够大
-            const range = XLSX.utils.decode_range(sheet['!ref'] || 'A1:A1');
-            if (range.e.r < rowIndex) {
-                range.e.r = rowIndex + 10; // 预留一些行
-                sheet['!ref'] = XLSX.utils.encode_range(range);
+            try {
+                const response = await fetch(`${jobsUrl}/${jobId}`);
+                if (!response.ok) {
+                    throw new Error(`服务错误: ${response.status}`);
+                }
+                const job = await response.json();
+                serverJobId = jobId;
+                fileName.textContent = job.file_name;
+                progressSection.classList.remove('hidden');
+                renderJobProgress(job);
+                if (job.state === 'queued' || job.state === 'running') {
+                    watchServerJob();
+                }
+            } catch (error) {
+                localStorage.removeItem(JOB_STORAGE_KEY);
             }
+        }
 
-            // 插入新行
-            XLSX.utils.sheet_add_aoa(sheet, [[]], {origin: rowIndex, insert: true});
+        // 批量查询接口每次提交的号码数，以及最多同时进行的批量请求数
+        // （每批较小，自适应控制器调整后的并发数能尽快用于下一批）
+        const BATCH_REQUEST_SIZE = 200;
+        const BATCH_REQUESTS_IN_FLIGHT = 2;
+
+        // 批量处理队列：优先使用批量查询接口（服务端并发查询，结果以NDJSON逐行流式返回），
+        // 批量接口不可用时回退为逐个号码查询
+        async function processQueueInBatches(queue) {
+            // 上游并发总数（同时进行的批量请求数 × 每批的服务端并发数）不超过自适应控制器的并发数
+            const controller = createConcurrencyController(concurrentCount);
+            const requestsInFlight = () => Math.min(BATCH_REQUESTS_IN_FLIGHT, controller.limit);
+
+            const validItems = [];
+            for (const item of queue) {
+                if (/^\d{11}$/.test(item.phoneNumber)) {
+                    validItems.push(item);
+                } else {
+                    // 无效手机号无需查询
+                    processingNumbers++;
+                    addLog(`失败: ${item.phoneNumber} → 无效手机号`);
+                    errorNumbers++;
+                    recordItemResult(item, '无效手机号', '无效手机号');
+                    finishItem();
+                }
+            }
+
+            const chunks = [];
+            for (let i = 0; i < validItems.length; i += BATCH_REQUEST_SIZE) {
+                chunks.push(validItems.slice(i, i + BATCH_REQUEST_SIZE));
+            }
+
+            // 多个批量请求交错进行，一批结束立即提交下一批，避免等待慢号码
+            let batchError = null;
+            await runPool(chunks, requestsInFlight, async chunk => {
+                if (batchError) return;
+                try {
+                    await queryBatch(chunk, controller, Math.max(1, Math.floor(controller.limit / requestsInFlight())));
+                } catch (error) {
+                    batchError = error;
+                }
+            });
+
+            if (batchError) {
+                addLog(`批量查询接口不可用（${batchError.message}），改为逐个查询`);
+                processQueuePerNumber(validItems.filter(item => !item.done));
+                return;
+            }
+            finishProcessing();
         }
 
-        // 复制行数据到新行
-        function copyRowData(originalRowIndex, newRowIndex) {
-            // 确保原始数据数组有足够的行
-            while (originalData.length <= newRowIndex) {
-                originalData.push([]);
+        // 提交一批号码到批量查询接口（服务端最多同时查询concurrency个号码），边接收边记录结果
+        async function queryBatch(items, controller, concurrency) {
+            const pending = new Map(); // 号码 → 等待该号码结果的队列项
+            for (const item of items) {
+                if (!pending.has(item.phoneNumber)) {
+                    pending.set(item.phoneNumber, []);
+                }
+                pending.get(item.phoneNumber).push(item);
             }
+            processingNumbers += items.length;
+            scheduleRender();
+
+            // 每个号码的结果都反馈给并发控制器
+            const ticket = controller.start();
+            const onResult = result => {
+                controller.record(result.code === 0, ticket);
+                handleBatchResult(result, pending);
+            };
 
-            // 复制原始数据到新行
-            if (originalRowIndex < originalData.length) {
-                const originalRow = originalData[originalRowIndex];
-                const newRow = originalData[newRowIndex];
+            try {
+                const response = await fetch(`${localProxyUrl}/batch`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ numbers: [...pending.keys()], concurrency })
+                });
+                if (!response.ok) {
+                    throw new Error(`服务错误: ${response.status}`);
+                }
 
-                // 复制所有列数据（除了电话号码列）
-                for (let i = 0; i < originalRow.length; i++) {
-                    if (i !== phoneColumn) {
-                        newRow[i] = originalRow[i];
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const lines = buffer.split('\\n');
+                    buffer = lines.pop(); // 最后一段可能是不完整的行
+                    for (const line of lines) {
+                        if (line.trim()) onResult(JSON.parse(line));
                     }
                 }
+                if (buffer.trim()) onResult(JSON.parse(buffer));
+
+                if (pending.size > 0) {
+                    throw new Error('批量查询结果不完整');
+                }
+            } finally {
+                // 未收到结果的号码交由调用方重新查询
+                let unfinished = 0;
+                pending.forEach(group => unfinished += group.length);
+                processingNumbers -= unfinished;
+                scheduleRender();
+            }
+        }
+
+        // 处理批量接口返回的一行结果，记录到所有等待该号码的队列项
+        function handleBatchResult(result, pending) {
+            const items = pending.get(result.number) || [];
+            pending.delete(result.number);
+
+            for (const item of items) {
+                if (result.code === 0 && result.data) {
+                    const { location, operator } = formatPhoneInfo(result.data);
+                    addLog(`成功: ${item.phoneNumber} → ${location}, ${operator}`);
+                    recordItemResult(item, location, operator);
+                } else {
+                    const errorMsg = result.msg || '查询无结果';
+                    addLog(`失败: ${item.phoneNumber} → ${errorMsg}`);
+                    errorNumbers++;
+                    recordItemResult(item, errorMsg, errorMsg);
+                }
+                item.done = true;
+                finishItem();
+            }
+        }
 
-                // 确保新行有足够的列
-                while (newRow.length <= operatorColumn) {
-                    newRow.push('');
+        // 逐个号码查询（批量接口不可用时使用）
+        function processQueuePerNumber(queue) {
+            const controller = createConcurrencyController(concurrentCount);
+
+            async function processItem(item) {
+                processingNumbers++;
+
+                try {
+                    // 查询结果反馈给并发控制器
+                    const ticket = controller.start();
+                    let result;
+                    try {
+                        result = await getPhoneInfo(item.phoneNumber);
+                        controller.record(true, ticket);
+                    } catch (error) {
+                        controller.record(false, ticket);
+                        throw error;
+                    }
+                    addLog(`成功: ${item.phoneNumber} → ${result.location}, ${result.operator}`);
+                    recordItemResult(item, result.location, result.operator);
+                } catch (error) {
+                    const errorMsg = error.message || '查询失败';
+                    addLog(`失败: ${item.phoneNumber} → ${errorMsg}`);
+                    errorNumbers++;
+
+                    // 即使出错也记录错误信息
+                    recordItemResult(item, errorMsg, errorMsg);
+                } finally {
+                    finishItem();
                 }
             }
+
+            // 工作池始终保持自适应控制器当前并发数的请求同时进行，任一请求完成立即补上下一个
+            runPool(queue, () => controller.limit, processItem).then(finishProcessing);
+        }
+
+        // 记录一个号码的查询结果（下载时统一合并到结果工作表）
+        function recordItemResult(item, location, operator) {
+            item.location = location;
+            item.operator = operator;
+        }
+
+        // 一个号码处理完成，更新计数（进度条在下一帧统一刷新）
+        function finishItem() {
+            processedNumbers++;
+            processingNumbers--;
+            scheduleRender();
+        }
+
+        // 全部号码处理完成，显示结果区域
+        function finishProcessing() {
+            progressSection.classList.add('hidden');
+            resultSection.classList.remove('hidden');
         }
 
         function cleanPhoneNumber(phone) {
@@ -741,10 +1008,7 @@ HTML_CONTENT = """<!DOCTYPE html>
                 const data = await response.json();
 
                 if (data.code === 0 && data.data) {
-                    return {
-                        location: `${data.data.province || ''}${data.data.city || ''}`.trim() || '未知地区',
-                        operator: data.data.sp || '未知运营商'
-                    };
+                    return formatPhoneInfo(data.data);
                 } else {
                     throw new Error('查询无结果');
                 }
@@ -759,8 +1023,23 @@ HTML_CONTENT = """<!DOCTYPE html>
             }
         }
 
+        // 将接口返回的data字段转换为归属地和运营商
+        function formatPhoneInfo(data) {
+            return {
+                location: `${data.province || ''}${data.city || ''}`.trim() || '未知地区',
+                operator: data.sp || '未知运营商'
+            };
+        }
+
         function downloadResultFile() {
-            if (!processedWorkbook || !selectedFile) return;
+            if (serverJobId) {
+                // 后台任务的结果由服务端直接发送
+                const a = document.createElement('a');
+                a.href = `${jobsUrl}/${serverJobId}/download`;
+                a.click();
+                return;
+            }
+            if (!selectedFile || processingQueue.length === 0) return;
 
             // 生成新文件名
             const originalName = selectedFile.name;
@@ -768,14 +1047,68 @@ HTML_CONTENT = """<!DOCTYPE html>
             const ext = originalName.substring(originalName.lastIndexOf('.'));
             const newFileName = `${nameWithoutExt}_已查询${ext}`;
 
-            // 转换为Excel文件并下载
-            const excelBuffer = XLSX.write(processedWorkbook, { bookType: 'xlsx', type: 'array' });
-            const blob = new Blob([excelBuffer], { type: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' });
+            // 在Worker中按原始行顺序合并结果并生成Excel文件
+            callSheetWorker({
+                type: 'write',
+                items: processingQueue,
+                phoneColumn,
+                locationColumn,
+                operatorColumn,
+                headers: [originalData[0][locationColumn], originalData[0][operatorColumn]]
+            })
+                .then(({ buffer }) => saveBuffer(buffer, newFileName))
+                .catch(error => {
+                    alert('生成结果文件失败，请重试');
+                    console.error('Excel生成错误:', error);
+                });
+        }
+
+        // 创建Web Worker（脚本来自页面内的 sheet-worker-source，通过Blob URL加载，无需额外文件）
+        function createSheetWorker() {
+            const source = document.getElementById('sheet-worker-source').textContent;
+            const url = URL.createObjectURL(new Blob([source], { type: 'text/javascript' }));
+            const worker = new Worker(url);
+
+            worker.onmessage = (e) => {
+                const { id, type } = e.data;
+                const call = workerCalls.get(id);
+                if (!call) return;
+                if (type === 'progress') {
+                    if (call.onProgress) call.onProgress(e.data);
+                    return;
+                }
+                workerCalls.delete(id);
+                if (type === 'error') {
+                    call.reject(new Error(e.data.message));
+                } else {
+                    call.resolve(e.data);
+                }
+            };
+            // Worker脚本加载失败（如无法访问CDN）时，结束所有等待中的调用
+            worker.onerror = (e) => {
+                workerCalls.forEach(call => call.reject(new Error(e.message || 'Worker加载失败')));
+                workerCalls.clear();
+            };
+            return worker;
+        }
+
+        // 向Worker发送一个任务，transfer 中的ArrayBuffer直接转移给Worker（不复制）
+        function callSheetWorker(message, transfer = [], onProgress = null) {
+            return new Promise((resolve, reject) => {
+                const id = ++workerCallId;
+                workerCalls.set(id, { resolve, reject, onProgress });
+                sheetWorker.postMessage({ ...message, id }, transfer);
+            });
+        }
+
+        // 将Worker生成的文件内容保存为下载
+        function saveBuffer(buffer, fileName) {
+            const blob = new Blob([buffer], { type: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' });
             const url = URL.createObjectURL(blob);
 
             const a = document.createElement('a');
             a.href = url;
-            a.download = newFileName;
+            a.download = fileName;
             a.click();
 
             // 释放URL资源
@@ -811,12 +1144,55 @@ HTML_CONTENT = """<!DOCTYPE html>
             return letter;
         }
 
+        // 添加一条日志，缓冲区已满时覆盖最早的一条
         function addLog(message) {
-            const logEntry = document.createElement('div');
-            logEntry.className = 'py-1 border-b border-gray-100 last:border-0';
-            logEntry.textContent = message;
-            recentLog.appendChild(logEntry);
-            recentLog.scrollTop = recentLog.scrollHeight;
+            if (logLength < LOG_SIZE) {
+                logBuffer[(logStart + logLength) % LOG_SIZE] = message;
+                logLength++;
+            } else {
+                logBuffer[logStart] = message;
+                logStart = (logStart + 1) % LOG_SIZE;
+            }
+            logDirty = true;
+            scheduleRender();
+        }
+
+        function clearLog() {
+            logStart = 0;
+            logLength = 0;
+            logDirty = false;
+            recentLog.innerHTML = '';
+        }
+
+        // 进度和日志每帧最多刷新一次，界面开销与号码数量、完成速度无关
+        function scheduleRender() {
+            if (renderScheduled) return;
+            renderScheduled = true;
+            requestAnimationFrame(renderProgress);
+        }
+
+        function renderProgress() {
+            renderScheduled = false;
+            const progress = totalNumbers ? Math.round((processedNumbers / totalNumbers) * 100) : 0;
+            overallProgressBar.style.width = `${progress}%`;
+            overallProgressText.textContent = `${processedNumbers}/${totalNumbers}`;
+            completedCount.textContent = processedNumbers;
+            processingCount.textContent = processingNumbers;
+            errorCount.textContent = errorNumbers;
+
+            if (logDirty) {
+                logDirty = false;
+                // 日志节点最多 LOG_SIZE 个，之后只更新文字
+                while (recentLog.children.length < logLength) {
+                    const logEntry = document.createElement('div');
+                    logEntry.className = 'py-1 border-b border-gray-100 last:border-0';
+                    recentLog.appendChild(logEntry);
+                }
+                for (let i = 0; i < logLength; i++) {
+                    recentLog.children[i].textContent = logBuffer[(logStart + i) % LOG_SIZE];
+                }
+                recentLog.scrollTop = recentLog.scrollHeight;
+            }
         }
 
         document.addEventListener('DOMContentLoaded', initEventListeners);
@@ -824,10 +1200,39 @@ HTML_CONTENT = """<!DOCTYPE html>
 </body>
 </html>"""
 
+
+def _read_frontend_file(name):
+    """读取与程序放在一起的前端文件（打包后位于PyInstaller的解压目录）"""
+    base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(base_dir, name), encoding="utf-8") as f:
+        return f.read()
+
+
+HTML_CONTENT = HTML_CONTENT.replace("__CONCURRENCY_JS__", _read_frontend_file("concurrency.js"))
+
+
 # 后端服务逻辑
 app = Flask(__name__)
 CORS(app, resources={r"/query": {"origins": "*"}})  # 允许所有本地请求
-API_URL = "https://cx.shouji.360.cn/phonearea.php"
+metrics.instrument(app)  # 记录请求耗时、状态码和进行中的请求数（/metrics 输出）
+API_URL = http_client.API_URL
+http_client.configure(pool_size=30)  # 连接池与前端最大并发数一致，转发请求复用长连接
+
+# 设置后每次启动把耗时追加写入该文件（JSONL），用于跟踪启动速度
+STARTUP_LOG = os.environ.get("PHONE_STARTUP_LOG")
+
+# 批量查询接口单次最多接收的号码数，服务端并发查询的线程数（与连接池大小一致），
+# 以及请求未指定并发数时单个批量请求同时查询的号码数
+MAX_BATCH_SIZE = 5000
+BATCH_WORKERS = 30
+DEFAULT_BATCH_CONCURRENCY = 15
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS)
+
+# 任务进度推送：同时保持的推送连接数上限，推送的最短间隔，以及无变化时的保活间隔（秒）
+MAX_EVENT_STREAMS = 4
+EVENT_INTERVAL = 0.5
+EVENT_KEEPALIVE = 15
+_event_streams = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
 
 
 @app.route('/query', methods=['GET'])
@@ -835,16 +1240,156 @@ def query_phone():
     """处理手机号查询请求"""
     phone_number = request.args.get('number', '')
 
-    if not phone_number or not phone_number.isdigit() or len(phone_number) != 11:
+    if not proxy_lookup.is_valid_number(phone_number):
+        proxy_lookup.record_invalid()
         return jsonify({"code": -1, "msg": "无效的手机号"}), 400
 
-    try:
-        response = requests.get(API_URL, params={"number": phone_number}, timeout=5)
-        response.raise_for_status()
-        return jsonify(response.json())
+    result, status = proxy_lookup.lookup_number(phone_number)
+    return jsonify(result), status
+
+
+@app.route('/query/batch', methods=['POST'])
+def query_batch():
+    """
+    批量查询：请求体为 {"numbers": [...], "concurrency": 最大并发数（可选）}，服务端通过缓存和连接池并发查询，
+    每完成一个号码即返回一行JSON（NDJSON流式响应），格式同 /query 并附带 number 字段
+    """
+    payload = request.get_json(silent=True) or {}
+    numbers = payload.get("numbers")
+    if not isinstance(numbers, list) or len(numbers) > MAX_BATCH_SIZE:
+        return jsonify({"code": -1, "msg": f"numbers需为不超过{MAX_BATCH_SIZE}个号码的列表"}), 400
+    concurrency = payload.get("concurrency")
+    max_workers = (min(concurrency, BATCH_WORKERS) if isinstance(concurrency, int) and concurrency > 0
+                   else DEFAULT_BATCH_CONCURRENCY)
+
+    def generate():
+        # 缓存键相同（默认为同一号段）的号码只查询一次
+        groups = {}
+        for number in map(str, numbers):
+            if proxy_lookup.is_valid_number(number):
+                groups.setdefault(result_cache.get_cache().key_for(number), []).append(number)
+            else:
+                proxy_lookup.record_invalid()
+                yield json.dumps({"code": -1, "msg": "无效的手机号", "number": number}, ensure_ascii=False) + "\n"
+
+        # 同时进行的查询不超过max_workers个，任一查询完成再提交下一个
+        remaining = iter(groups.values())
+        futures = {}
+
+        def submit_next():
+            group = next(remaining, None)
+            if group is not None:
+                futures[_batch_executor.submit(proxy_lookup.lookup_number, group[0], len(group))] = group
+
+        try:
+            for _ in range(max_workers):
+                submit_next()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    group = futures.pop(future)
+                    submit_next()
+                    result, _ = future.result()
+                    for number in group:
+                        yield json.dumps({**result, "number": number}, ensure_ascii=False) + "\n"
+        finally:
+            # 客户端中途断开时取消尚未开始的查询
+            for future in futures:
+                future.cancel()
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    上传Excel创建后台查询任务（表单字段：file 文件，phone_column 电话列序号（可选），concurrency 最大并发数）
+    任务在服务端运行，关闭或刷新页面不影响处理
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename.lower().endswith(('.xlsx', '.xls')):
+        return jsonify({"code": -1, "msg": "请上传Excel文件（.xlsx 或 .xls格式）"}), 400
+    if upload.filename.lower().endswith('.xls'):
+        # 读取.xls需要额外安装xlrd，服务端任务只支持.xlsx
+        return jsonify({"code": -1, "msg": "服务端处理仅支持.xlsx格式，请将.xls文件另存为.xlsx，或关闭服务端处理"}), 400
+
+    import jobs  # 按需导入（依赖pandas）
+
+    phone_column = request.form.get('phone_column', '')
+    concurrency = request.form.get('concurrency', '')
+    job = jobs.create_job(
+        upload.filename, upload.save,
+        phone_column=int(phone_column) if phone_column.isdigit() else None,
+        max_workers=min(int(concurrency), BATCH_WORKERS) if concurrency.isdigit() else DEFAULT_BATCH_CONCURRENCY,
+    )
+    return jsonify({"code": 0, "id": job.id})
+
+
+def get_job(job_id):
+    """查找后台任务；还没有创建过任务时jobs模块尚未导入，直接返回None"""
+    jobs = sys.modules.get('jobs')
+    return jobs.get_job(job_id) if jobs is not None else None
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """查询任务状态"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"code": -1, "msg": "任务不存在"}), 404
+    return jsonify(job.snapshot())
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """任务进度推送（Server-Sent Events），任务结束后推送最终状态并关闭"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"code": -1, "msg": "任务不存在"}), 404
+
+    # 每个推送连接在任务结束前一直占用一个工作线程，超出上限时让页面改为定时查询状态
+    if not _event_streams.acquire(blocking=False):
+        return jsonify({"code": -1, "msg": "进度推送连接过多，请通过任务状态接口查询"}), 503
+
+    def generate():
+        version = None
+        while True:
+            # 任务有变化时推送，长时间无变化时重复推送当前状态以保持连接
+            version = job.wait_for_change(version, timeout=EVENT_KEEPALIVE)
+            snapshot = job.snapshot()
+            yield f"data: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+            if snapshot["state"] in (job.DONE, job.FAILED):
+                return
+            # 进度变化频繁，合并 EVENT_INTERVAL 秒内的变化再推送；任务结束时立即推送
+            job.wait_finished(timeout=EVENT_INTERVAL)
 
-    except requests.exceptions.RequestException as e:
-        return jsonify({"code": -2, "msg": f"查询失败: {str(e)}"}), 500
+    response = Response(generate(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(_event_streams.release)
+    return response
+
+
+@app.route('/jobs/<job_id>/download', methods=['GET'])
+def job_download(job_id):
+    """下载任务结果文件（从磁盘流式发送）"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"code": -1, "msg": "任务不存在"}), 404
+    if job.state != job.DONE:
+        return jsonify({"code": -1, "msg": "任务尚未完成"}), 409
+    return send_file(job.output_path, as_attachment=True, download_name=job.download_name)
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """查看缓存命中统计（memory为代理内存缓存及请求合并统计）"""
+    return jsonify({**result_cache.stats(), "memory": proxy_lookup.stats()})
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus格式的运行指标：请求与上游延迟直方图、按结果分类的查询次数、进行中的请求数、缓存命中率"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route('/')
@@ -868,12 +1413,39 @@ def find_available_port(start=5000, max_attempts=20):
 
 
 def run_server(port):
-    """启动Flask服务"""
+    """启动Flask服务（waitress多线程服务器，未安装时使用Flask开发服务器）"""
     app.config['PORT'] = port
-    app.run(host='localhost', port=port, debug=False, use_reloader=False)
+    wsgi_server.serve(app, 'localhost', port)
+
+
+def wait_until_ready(port, timeout=10):
+    """反复连接服务端口直到成功，返回服务是否在超时前就绪"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('localhost', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+
+def record_startup(seconds):
+    """输出启动耗时，设置了 PHONE_STARTUP_LOG 时同时追加写入该文件"""
+    print(f"启动用时: {seconds:.2f} 秒")
+    if STARTUP_LOG:
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "seconds": round(seconds, 3),
+            "frozen": getattr(sys, "frozen", False),  # 是否为PyInstaller打包后的程序
+        }
+        with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
 
 
 def main():
+    http_client.enable_dns_cache()  # 转发请求时同一主机只解析一次DNS
+
     # 查找可用端口
     port = find_available_port()
     if not port:
@@ -885,8 +1457,16 @@ def main():
     server_thread = threading.Thread(target=run_server, args=(port,), daemon=True)
     server_thread.start()
 
-    # 等待服务启动
-    time.sleep(1)
+    # 等待服务端口可以连接后再打开浏览器
+    if not wait_until_ready(port):
+        print("错误：服务启动超时")
+        input("按任意键退出...")
+        return
+    record_startup(time.perf_counter() - _STARTED_AT)
+
+    # --startup-check：只测量启动耗时，服务就绪后直接退出
+    if "--startup-check" in sys.argv:
+        return
 
     # 打开浏览器
     print(f"服务已启动，端口: {port}")
@@ -1,44 +1,90 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
 
+NAME = '手机号归属地查询工具'
+# 默认打包为目录（onedir）：启动时直接加载目录中的文件，不必像单文件那样每次先把整个程序解压到临时目录
+# 需要单文件时设置环境变量 PHONE_APP_ONEFILE=1 后再打包
+ONEFILE = os.environ.get('PHONE_APP_ONEFILE') == '1'
 
 a = Analysis(
-    ['/Users/harry/Downloads/phone_location_app.py'],
-    pathex=[],
+    [os.path.join(SPECPATH, '开箱即用.py')],
+    pathex=[SPECPATH],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    # 网页共用的并发控制脚本，启动时内嵌到页面中
+    datas=[(os.path.join(SPECPATH, 'concurrency.js'), '.')],
+    # jobs 在创建后台任务时才导入；pandas按引擎名动态加载openpyxl，静态分析发现不了
+    hiddenimports=['jobs', '号码归属地查询并发版', 'excel_stream', 'phone_column', 'checkpoint', 'concurrency',
+                   'openpyxl', 'tqdm'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # 程序用不到的大型模块（pandas等的可选依赖），排除后体积更小、启动更快
+    excludes=[
+        'tkinter', 'matplotlib', 'scipy', 'IPython', 'jupyter_client', 'notebook',
+        'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'pytest', 'sphinx', 'docutils',
+        'aiohttp',  # asyncio查询引擎只在命令行版本中使用
+    ],
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='手机号归属地查询工具',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
-app = BUNDLE(
-    exe,
-    name='手机号归属地查询工具.app',
-    icon=None,
-    bundle_identifier=None,
-)
+# 不使用UPX压缩：压缩后的动态库每次启动都要先解压，拖慢冷启动
+if ONEFILE:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name=NAME,
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    target = exe
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name=NAME,
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    target = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        name=NAME,
+    )
+
+if sys.platform == 'darwin':
+    app = BUNDLE(
+        target,
+        name=f'{NAME}.app',
+        icon=None,
+        bundle_identifier=None,
+    )
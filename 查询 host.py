@@ -1,12 +1,18 @@
-from flask import Flask, request, jsonify
-import requests
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS  # 仅允许本地前端访问
+import result_cache
+import http_client
+import metrics
+import proxy_lookup
+import wsgi_server
 
 app = Flask(__name__)
 CORS(app, resources={r"/query": {"origins": "http://localhost:*"}})  # 限制仅本地前端可访问
+metrics.instrument(app)  # 记录请求耗时、状态码和进行中的请求数（/metrics 输出）
 
 # 360手机号归属地API地址
-API_URL = "https://cx.shouji.360.cn/phonearea.php"
+API_URL = http_client.API_URL
+http_client.configure(pool_size=30)  # 连接池与前端最大并发数一致，转发请求复用长连接
 
 
 @app.route('/query', methods=['GET'])
@@ -14,21 +20,30 @@ def query_phone():
     """接收前端请求，转发到360API，返回结果"""
     phone_number = request.args.get('number', '')
 
-    if not phone_number or not phone_number.isdigit() or len(phone_number) != 11:
+    if not proxy_lookup.is_valid_number(phone_number):
+        proxy_lookup.record_invalid()
         return jsonify({"code": -1, "msg": "无效的手机号"}), 400
 
-    try:
-        # 转发请求到360API
-        response = requests.get(API_URL, params={"number": phone_number}, timeout=5)
-        response.raise_for_status()  # 抛出HTTP错误
-        return jsonify(response.json())
+    # 依次查询内存缓存、本地缓存，都未命中才转发；同一号段的并发请求只转发一次
+    result, status = proxy_lookup.lookup_number(phone_number)
+    return jsonify(result), status
 
-    except requests.exceptions.RequestException as e:
-        return jsonify({"code": -2, "msg": f"API请求失败: {str(e)}"}), 500
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """查看缓存命中统计（memory为代理内存缓存及请求合并统计）"""
+    return jsonify({**result_cache.stats(), "memory": proxy_lookup.stats()})
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus格式的运行指标：请求与上游延迟直方图、按结果分类的查询次数、进行中的请求数、缓存命中率"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 if __name__ == '__main__':
     print("本地代理服务启动成功！")
     print("访问地址: http://localhost:5000")
     print("请保持本窗口开启，关闭则服务停止")
-    app.run(host='0.0.0.0', port=1029, debug=False)  # 启动服务
\ No newline at end of file
+    http_client.enable_dns_cache()  # 转发请求时同一主机只解析一次DNS
+    wsgi_server.serve(app, '0.0.0.0', 1029)  # 启动服务（waitress多线程服务器）
\ No newline at end of file